@@ -5,6 +5,7 @@ import asyncio
 import logging
 import os
 import sys
+import time
 from pathlib import Path
 from typing import Dict, List, Any
 
@@ -13,7 +14,8 @@ from modules.traversal import AsyncDirectoryWalker
 from modules.file_processor import FileProcessor
 from modules.metadata_store import MetadataStore
 from modules.output_writer import OutputWriter
-# from modules.graph_mapper import KnowledgeGraphMapper  # For future use
+from modules.extraction_cache import ExtractionCache
+from modules.graph_mapper import KnowledgeGraphMapper
 
 # -------------------- Step 1: Initialization --------------------
 
@@ -22,46 +24,103 @@ def parse_args():
     parser.add_argument("root_folder", type=str, help="Root folder to scan")
     parser.add_argument("--log_file", type=str, default="scan.log", help="Log file path")
     parser.add_argument("--output", type=str, default="metadata.json", help="Metadata output file")
-    parser.add_argument("--format", type=str, choices=["json", "csv"], default="json", help="Output format")
-    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent workers")
+    parser.add_argument("--format", type=str, choices=["json", "ndjson", "csv"], default="json",
+                        help="Output format; records are streamed to disk as they are processed")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Concurrent workers in the PDF lane (largest PDFs first)")
+    parser.add_argument("--txt_concurrency", type=int, default=2,
+                        help="Concurrent workers in the text lane, so .txt files never wait behind PDFs")
+    parser.add_argument("--scan_concurrency", type=int, default=8,
+                        help="Folders listed in parallel while files are already being processed")
+    parser.add_argument("--max_pending", type=int, default=1000,
+                        help="Files queued per lane before the directory scan waits for workers")
+    parser.add_argument("--backend", type=str, choices=["async", "process"], default="async",
+                        help="Extraction backend: in-loop async handlers or a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--cache", type=str, default=None,
+                        help="SQLite extraction cache path; unchanged files are not re-extracted")
+    parser.add_argument("--cache_max_mb", type=int, default=512, help="Extraction cache size limit in MB")
+    parser.add_argument("--graph", action="store_true",
+                        help="Stream records into Neo4j while files are being processed")
+    parser.add_argument("--neo4j_uri", type=str, default="bolt://localhost:7687", help="Neo4j URI")
+    parser.add_argument("--neo4j_user", type=str, default="neo4j", help="Neo4j user")
+    parser.add_argument("--neo4j_password", type=str, default="graph@123", help="Neo4j password")
+    parser.add_argument("--graph_batch_size", type=int, default=100, help="Documents per graph write")
     return parser.parse_args()
 
 async def main():
+    started = time.perf_counter()
     args = parse_args()
     logger = setup_logger(args.log_file)
-    logger.info("Initialization complete.")
 
-    metadata_store = MetadataStore()
-    file_processor = FileProcessor(logger, metadata_store)
+    writer = OutputWriter(args.output, args.format, logger).open()
+    metadata_store = MetadataStore(writer=writer)
+    cache = ExtractionCache(args.cache, args.cache_max_mb * 1024 * 1024) if args.cache else None
+    graph_mapper = None
+    driver = None
+    if args.graph:
+        from neo4j import GraphDatabase
+        from modules.neo4j_handler import Neo4jHandler
+        driver = GraphDatabase.driver(args.neo4j_uri, auth=(args.neo4j_user, args.neo4j_password))
+        graph_mapper = KnowledgeGraphMapper(
+            Neo4jHandler(driver), logger, args.root_folder, batch_size=args.graph_batch_size
+        )
+    file_processor = FileProcessor(
+        logger, metadata_store, cache=cache,
+        on_result=graph_mapper.submit if graph_mapper else None,
+        max_pending=args.max_pending
+    )
     walker = AsyncDirectoryWalker(
         root_folder=args.root_folder,
         file_callback=file_processor.enqueue_file,
-        logger=logger
+        logger=logger,
+        scan_concurrency=args.scan_concurrency
     )
+    logger.info(f"Initialization complete in {time.perf_counter() - started:.3f}s.")
 
-    # -------------------- Step 2: Directory Traversal (Async) --------------------
-    logger.info("Starting async directory traversal.")
-    await walker.walk()
-
-    # -------------------- Step 3: File Processing (Async Workers) --------------------
+    # -------------------- Step 2/3: Traversal and File Processing (Overlapped) --------------------
+    # Workers start first and pick files up as the walker streams them in; the
+    # bounded lanes make the walker wait when workers fall behind.
+    if graph_mapper is not None:
+        logger.info("Starting knowledge graph sink.")
+        await graph_mapper.start()
     logger.info("Starting async file processing.")
-    await file_processor.run_workers(concurrency=args.concurrency)
+    processing = asyncio.create_task(file_processor.run_workers(
+        backend=args.backend,
+        workers=args.workers,
+        lane_concurrency={"pdf": args.concurrency, "text": args.txt_concurrency}
+    ))
+    logger.info("Starting concurrent directory traversal.")
+    try:
+        try:
+            await walker.walk()
+        finally:
+            file_processor.close()
+        await processing
+    except BaseException:
+        # Keep the previous output; what was processed so far stays in the .partial file
+        writer.abort()
+        raise
+    metadata_store.folder_count = walker.folder_count
+
+    if cache is not None:
+        cache.close()
 
     # -------------------- Step 4: Metadata Aggregation --------------------
-    logger.info("Aggregating metadata.")
-    metadata = metadata_store.get_all_metadata()
+    # Records were streamed to the writer as they were processed (Step 3).
 
     # -------------------- Step 5: Logging --------------------
     logger.info(f"Processed {metadata_store.file_count} files and {metadata_store.folder_count} folders.")
 
     # -------------------- Step 6: Output Generation --------------------
-    writer = OutputWriter(args.output, args.format, logger)
-    writer.write(metadata)
+    writer.close()
     logger.info(f"Metadata written to {args.output} in {args.format} format.")
 
-    # -------------------- Step 7: Knowledge Graph Mapping (Future) --------------------
-    # graph_mapper = KnowledgeGraphMapper()
-    # graph_mapper.ingest(metadata)
+    # -------------------- Step 7: Knowledge Graph Mapping (Streaming) --------------------
+    # Records were streamed to the graph during Step 3; flush the tail here.
+    if graph_mapper is not None:
+        await graph_mapper.close()
+        driver.close()
 
 if __name__ == "__main__":
     try:
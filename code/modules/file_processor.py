@@ -1,42 +1,126 @@
 import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
-from .handlers.pdf_handler import extract_pdf_metadata
-from .handlers.txt_handler import extract_txt_metadata
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .handlers import pdf_handler, txt_handler
+from .handlers.pdf_handler import extract_pdf_metadata, read_pdf_metadata
+from .handlers.txt_handler import extract_txt_metadata, read_txt_metadata
+from .hashing import file_hash
+from .extraction_cache import ExtractionCache
+from .scheduling import LaneQueues, DEFAULT_LANE_CONCURRENCY, estimate_cost
 
 SUPPORTED_TYPES = {
     ".pdf": extract_pdf_metadata,
     ".txt": extract_txt_metadata,
 }
 
+# Blocking counterparts used by the "process" backend
+SYNC_TYPES = {
+    ".pdf": read_pdf_metadata,
+    ".txt": read_txt_metadata,
+}
+
+# Cache version per type: a handler change only invalidates its own entries
+CACHE_VERSIONS = {
+    ".pdf": pdf_handler.HANDLER_VERSION,
+    ".txt": txt_handler.HANDLER_VERSION,
+}
+
+BACKENDS = ("async", "process")
+
 class FileProcessor:
-    def __init__(self, logger, metadata_store):
+    def __init__(self, logger, metadata_store, cache: Optional[ExtractionCache] = None,
+                 on_result: Optional[Callable[[Path, Any], Awaitable[None]]] = None,
+                 max_pending: int = 0):
         self.logger = logger
         self.metadata_store = metadata_store
-        self.queue = asyncio.Queue()
+        self.cache = cache
+        self.on_result = on_result  # e.g. KnowledgeGraphMapper.submit
+        self.queues = LaneQueues(maxsize=max_pending)
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self._closed = asyncio.Event()  # set once no more files will be enqueued
 
     async def enqueue_file(self, file_path: Path):
-        await self.queue.put(file_path)
+        lane = self.queues.lane_for(file_path)
+        if lane is None:
+            self.logger.warning(f"Unsupported file type: {file_path}")
+            return
+        cost, pages = await asyncio.to_thread(estimate_cost, file_path)
+        if pages is not None:
+            self.logger.debug(f"Queued {file_path} ({pages} pages, cost {cost}) in lane {lane}")
+        await self.queues.put(lane, file_path, cost)
+
+    def close(self):
+        """No more files are coming; run_workers returns once the lanes drain."""
+        self._closed.set()
+
+    async def run_workers(self, concurrency: Optional[int] = None, backend: str = "async",
+                          workers: Optional[int] = None, lane_concurrency: Optional[Dict[str, int]] = None):
+        """Start workers per lane and process files until close() and the lanes drain.
+
+        Can run while files are still being enqueued; `concurrency` overrides
+        the PDF lane only (legacy).
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        lanes = dict(DEFAULT_LANE_CONCURRENCY, **(lane_concurrency or {}))
+        if concurrency is not None:
+            lanes["pdf"] = concurrency
+        if backend == "process":
+            workers = workers or os.cpu_count() or 1
+            self.pool = ProcessPoolExecutor(max_workers=workers)
+            # Keep every pool worker fed
+            lanes["pdf"] = max(lanes["pdf"], workers)
+        try:
+            tasks = [
+                asyncio.create_task(self.worker(lane))
+                for lane, count in lanes.items() if lane in self.queues.queues
+                for _ in range(max(1, count))
+            ]
+            await self._closed.wait()
+            await self.queues.join()
+            for t in tasks:
+                t.cancel()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+    async def extract(self, file_path: Path, ext: str) -> Any:
+        if self.cache is None:
+            return await self.run_handler(file_path, ext)
+
+        digest = await asyncio.to_thread(file_hash, str(file_path))
+        cached = await asyncio.to_thread(self.cache.get, ext, digest, CACHE_VERSIONS[ext])
+        if cached is not None:
+            # Same content may live under another name or folder
+            cached.update({"name": file_path.name, "path": str(file_path)})
+            return cached
+
+        metadata = await self.run_handler(file_path, ext)
+        metadata["hash"] = digest
+        if "error" not in metadata:
+            await asyncio.to_thread(self.cache.put, ext, digest, CACHE_VERSIONS[ext], metadata)
+        return metadata
 
-    async def run_workers(self, concurrency: int = 8):
-        tasks = [asyncio.create_task(self.worker()) for _ in range(concurrency)]
-        await self.queue.join()
-        for t in tasks:
-            t.cancel()
+    async def run_handler(self, file_path: Path, ext: str) -> Any:
+        if self.pool is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, SYNC_TYPES[ext], file_path)
+        return await SUPPORTED_TYPES[ext](file_path)
 
-    async def worker(self):
+    async def worker(self, lane: str):
         while True:
-            file_path = await self.queue.get()
+            file_path = await self.queues.get(lane)
             try:
                 ext = file_path.suffix.lower()
-                if ext in SUPPORTED_TYPES:
-                    extractor = SUPPORTED_TYPES[ext]
-                    metadata = await extractor(file_path)
-                    self.metadata_store.add_file_metadata(file_path, metadata)
-                    self.logger.info(f"Processed file: {file_path}")
-                else:
-                    self.logger.warning(f"Unsupported file type: {file_path}")
+                metadata = await self.extract(file_path, ext)
+                self.metadata_store.add_file_metadata(file_path, metadata)
+                if self.on_result is not None:
+                    await self.on_result(file_path, metadata)
+                self.logger.info(f"Processed file: {file_path}")
             except Exception as e:
                 self.logger.error(f"Error processing {file_path}: {e}")
             finally:
-                self.queue.task_done()
\ No newline at end of file
+                self.queues.task_done(lane)
@@ -1,5 +1,110 @@
-# Placeholder for future knowledge graph mapping logic
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .hashing import file_hash
+
+def infer_tags(relative_path: str) -> Dict[str, str]:
+    # Same folder convention as the web app: domain/region/client/...
+    parts = relative_path.replace("\\", "/").split("/")
+    return {
+        "domain": parts[0] if len(parts) > 0 else "Unknown",
+        "region": parts[1] if len(parts) > 1 else "Unknown",
+        "client": parts[2] if len(parts) > 2 else "Unknown"
+    }
+
 class KnowledgeGraphMapper:
-    def ingest(self, metadata):
-        # Map metadata to graph schema and ingest into graph DB
-        pass
\ No newline at end of file
+    """Streaming graph sink for the CLI pipeline.
+
+    Workers submit records as they finish; a background task maps them to the
+    Neo4jHandler schema (handler is a modules.neo4j_handler.Neo4jHandler) and flushes them in batches, so graph writes overlap
+    extraction. The queue is bounded, so a slow graph applies backpressure to
+    the workers instead of buffering the whole corpus.
+    """
+
+    def __init__(self, handler, logger, root_folder: str,
+                 batch_size: int = 100, max_pending: int = 1000, flush_interval: float = 2.0):
+        self.handler = handler
+        self.logger = logger
+        self.root_folder = Path(root_folder)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.written = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await asyncio.to_thread(self.handler.ensure_schema)
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, file_path: Path, metadata: Dict[str, Any]):
+        await self.queue.put(metadata)
+
+    async def close(self):
+        """Flush what is left and stop the background task."""
+        await self.queue.put(None)
+        if self._task is not None:
+            await self._task
+        self.logger.info(f"Graph mapping complete: {self.written} documents written.")
+
+    def ingest(self, metadata: List[Dict[str, Any]]):
+        # Map metadata to graph schema and ingest into graph DB (blocking, all at once)
+        docs = [self.map_record(record) for record in metadata if "error" not in record]
+        self.handler.create_document_graphs(docs, batch_size=self.batch_size)
+        self.written += len(docs)
+
+    def map_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        path = Path(record["path"])
+        try:
+            relative_path = str(path.relative_to(self.root_folder))
+        except ValueError:
+            relative_path = path.name
+        digest = record.get("hash") or file_hash(str(path))
+        summary = record.get("summary", "")
+        return {
+            "id": digest[:12],
+            "filename": record["name"],
+            "relative_path": relative_path,
+            "language": record.get("language", "unknown"),
+            "page_count": record.get("pages", 0),
+            "content_length": record.get("content_length", len(summary)),
+            "overview_summary": summary,
+            "ingested_at": datetime.now(timezone.utc).isoformat(),
+            "tags": infer_tags(relative_path),
+            "industry_tags": record.get("industry_tags", {}),
+            "entities": record.get("entities", {})
+        }
+
+    async def _run(self):
+        batch: List[Dict[str, Any]] = []
+        while True:
+            try:
+                record = await asyncio.wait_for(self.queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                # Idle: don't let a partial batch wait for the next record
+                await self._flush(batch)
+                continue
+            if record is None:
+                break
+            if "error" in record:
+                continue
+            try:
+                batch.append(await asyncio.to_thread(self.map_record, record))
+            except Exception as e:
+                self.logger.error(f"Graph mapping failed for {record.get('path')}: {e}")
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+        await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        docs = list(batch)
+        batch.clear()
+        try:
+            await asyncio.to_thread(self.handler.create_document_graphs, docs, len(docs))
+            self.written += len(docs)
+            self.logger.info(f"Graph batch written: {len(docs)} documents ({self.written} total).")
+        except Exception as e:
+            self.logger.error(f"Graph batch of {len(docs)} documents failed: {e}")
@@ -2,9 +2,11 @@ import asyncio
 from pathlib import Path
 from PyPDF2 import PdfReader
 
-async def extract_pdf_metadata(file_path: Path) -> dict:
-    # Simulate async I/O
-    await asyncio.sleep(0)
+# Bump when the extracted fields change; invalidates cached results
+HANDLER_VERSION = "pypdf2-2"
+
+def read_pdf_metadata(file_path: Path) -> dict:
+    """Blocking extraction; safe to run in a worker process."""
     metadata = {
         "type": "pdf",
         "name": file_path.name,
@@ -13,11 +15,21 @@ async def extract_pdf_metadata(file_path: Path) -> dict:
     try:
         reader = PdfReader(str(file_path))
         metadata["pages"] = len(reader.pages)
-        text = ""
+        # Page by page: keep running counts and the head only, never the whole text
+        word_count = 0
+        summary = ""
         for page in reader.pages:
-            text += page.extract_text() or ""
-        metadata["word_count"] = len(text.split())
-        metadata["summary"] = text[:200]  # Placeholder for NLP summary
+            page_text = page.extract_text() or ""
+            word_count += len(page_text.split())
+            if len(summary) < 200:
+                summary = (summary + page_text)[:200]
+        metadata["word_count"] = word_count
+        metadata["summary"] = summary  # Placeholder for NLP summary
     except Exception as e:
         metadata["error"] = str(e)
-    return metadata
\ No newline at end of file
+    return metadata
+
+async def extract_pdf_metadata(file_path: Path) -> dict:
+    # Simulate async I/O
+    await asyncio.sleep(0)
+    return read_pdf_metadata(file_path)
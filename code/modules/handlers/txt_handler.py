@@ -1,6 +1,30 @@
 import aiofiles
 from pathlib import Path
 
+# Bump when the extracted fields change; invalidates cached results
+HANDLER_VERSION = "txt-1"
+
+def _txt_metadata(file_path: Path, content: str) -> dict:
+    return {
+        "line_count": content.count("\n") + 1,
+        "word_count": len(content.split()),
+        "summary": content[:200],  # Placeholder for NLP summary
+    }
+
+def read_txt_metadata(file_path: Path) -> dict:
+    """Blocking extraction; safe to run in a worker process."""
+    metadata = {
+        "type": "txt",
+        "name": file_path.name,
+        "path": str(file_path),
+    }
+    try:
+        with open(file_path, mode="r", encoding="utf-8", errors="ignore") as f:
+            metadata.update(_txt_metadata(file_path, f.read()))
+    except Exception as e:
+        metadata["error"] = str(e)
+    return metadata
+
 async def extract_txt_metadata(file_path: Path) -> dict:
     metadata = {
         "type": "txt",
@@ -10,9 +34,7 @@ async def extract_txt_metadata(file_path: Path) -> dict:
     try:
         async with aiofiles.open(file_path, mode="r", encoding="utf-8", errors="ignore") as f:
             content = await f.read()
-            metadata["line_count"] = content.count("\n") + 1
-            metadata["word_count"] = len(content.split())
-            metadata["summary"] = content[:200]  # Placeholder for NLP summary
+            metadata.update(_txt_metadata(file_path, content))
     except Exception as e:
         metadata["error"] = str(e)
-    return metadata
\ No newline at end of file
+    return metadata
@@ -0,0 +1,55 @@
+import os
+import hashlib
+import threading
+from typing import Dict, Tuple
+
+# Read files in fixed-size buffers so hashing never loads a whole PDF
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# md5 keeps document ids (hash[:12]) stable across runs; "blake2b" is faster
+# on large files and "xxh64" is fastest if the optional xxhash package exists.
+# Changing the algorithm changes every document id.
+DEFAULT_HASH_ALGORITHM = "md5"
+
+def _new_hasher(algorithm: str):
+    if algorithm == "xxh64":
+        import xxhash  # optional dependency
+        return xxhash.xxh64()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    return hashlib.new(algorithm)
+
+def file_hash(path: str, algorithm: str = DEFAULT_HASH_ALGORITHM, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    hasher = _new_hasher(algorithm)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+class HashCache:
+    """Per-run digest cache so each file is hashed at most once.
+
+    Entries are keyed by (path, size, mtime_ns), so a file rewritten during the
+    run is hashed again rather than served a stale digest.
+    """
+
+    def __init__(self, algorithm: str = DEFAULT_HASH_ALGORITHM):
+        self.algorithm = algorithm
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> str:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_hash(path, self.algorithm)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
@@ -2,13 +2,19 @@ from typing import Dict, Any
 from pathlib import Path
 
 class MetadataStore:
-    def __init__(self):
+    def __init__(self, writer=None):
+        # With a writer (modules.output_writer.OutputWriter) records are streamed
+        # to disk as they arrive and not kept in memory
+        self.writer = writer
         self._metadata = []
         self.file_count = 0
         self.folder_count = 0
 
     def add_file_metadata(self, file_path: Path, metadata: Dict[str, Any]):
-        self._metadata.append(metadata)
+        if self.writer is not None:
+            self.writer.write_record(metadata)
+        else:
+            self._metadata.append(metadata)
         self.file_count += 1
 
     def get_all_metadata(self):
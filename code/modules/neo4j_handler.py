@@ -1,27 +1,152 @@
-from neo4j import GraphDatabase
-from typing import Dict
+from typing import Dict, List
+
+DEFAULT_BATCH_SIZE = 500
+
+# (node label, relationship type, key in the batch row) written per document
+RELATIONSHIPS = [
+    ("Client", "BELONGS_TO", "clients"),
+    ("Region", "LOCATED_IN", "regions"),
+    ("Domain", "PART_OF", "domains"),
+    ("Industry", "TAGGED_AS", "industries"),
+    ("Technology", "MENTIONS", "technologies"),
+    ("Partner", "PARTNERED_WITH", "partners"),
+    ("Product", "DESCRIBES", "products"),
+]
+
+# Document-to-document links written by link_documents(), from the newer copy
+# to the older one
+DOCUMENT_LINK_TYPES = ("DUPLICATE_OF", "VERSION_OF")
+
+# Uniqueness constraints backing every MERGE key; each also creates an index
+SCHEMA_CONSTRAINTS = [
+    ("document_id", "Document", "id"),
+    ("client_name", "Client", "name"),
+    ("region_name", "Region", "name"),
+    ("domain_name", "Domain", "name"),
+    ("industry_name", "Industry", "name"),
+    ("technology_name", "Technology", "name"),
+    ("partner_name", "Partner", "name"),
+    ("product_name", "Product", "name"),
+]
 
 class Neo4jHandler:
     def __init__(self, driver):
         self.driver = driver
 
+    def ensure_schema(self) -> Dict:
+        """Create the knowledge-graph constraints if missing; safe to run repeatedly.
+
+        Returns the indexes present afterwards so callers can log or expose them.
+        """
+        with self.driver.session() as session:
+            for name, label, prop in SCHEMA_CONSTRAINTS:
+                session.run(
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+                ).consume()
+            indexes = [
+                {
+                    "name": record["name"],
+                    "labels": record["labelsOrTypes"],
+                    "properties": record["properties"],
+                    "state": record["state"]
+                }
+                for record in session.run(
+                    "SHOW INDEXES YIELD name, labelsOrTypes, properties, state"
+                )
+            ]
+        expected = {name for name, _, _ in SCHEMA_CONSTRAINTS}
+        present = {index["name"] for index in indexes}
+        return {
+            "indexes": indexes,
+            "missing_constraints": sorted(expected - present)
+        }
+
     def create_document_graph(self, doc: Dict):
         with self.driver.session() as session:
             session.write_transaction(self._create_nodes_and_relationships, doc)
 
+    def delete_documents(self, ids: List[str]):
+        with self.driver.session() as session:
+            session.write_transaction(self._delete_documents, ids)
+
+    @staticmethod
+    def _delete_documents(tx, ids: List[str]):
+        tx.run("""
+            UNWIND $ids AS id
+            MATCH (d:Document {id: id})
+            DETACH DELETE d
+        """, {"ids": ids})
+
+    def link_documents(self, links: List[Dict]):
+        """Replace every DUPLICATE_OF / VERSION_OF relationship with `links`.
+
+        Each link is {"from": id, "to": id, "type": one of DOCUMENT_LINK_TYPES, "similarity": float}.
+        """
+        with self.driver.session() as session:
+            session.write_transaction(self._link_documents, links)
+
+    @staticmethod
+    def _link_documents(tx, links: List[Dict]):
+        tx.run(f"""
+            MATCH (:Document)-[r:{'|'.join(DOCUMENT_LINK_TYPES)}]->(:Document)
+            DELETE r
+        """)
+        for rel in DOCUMENT_LINK_TYPES:
+            rows = [link for link in links if link["type"] == rel]
+            if not rows:
+                continue
+            tx.run(f"""
+                UNWIND $rows AS row
+                MATCH (a:Document {{id: row.from}}), (b:Document {{id: row.to}})
+                MERGE (a)-[r:{rel}]->(b)
+                SET r.similarity = row.similarity
+            """, {"rows": rows})
+
     @staticmethod
     def _create_nodes_and_relationships(tx, doc: Dict):
-        # Create Document node
+        Neo4jHandler._write_batch(tx, [doc])
+
+    def create_document_graphs(self, docs: List[Dict], batch_size: int = DEFAULT_BATCH_SIZE):
+        """Write many documents with one UNWIND statement per node type per batch."""
+        with self.driver.session() as session:
+            for start in range(0, len(docs), batch_size):
+                session.write_transaction(self._write_batch, docs[start:start + batch_size])
+
+    @staticmethod
+    def _write_batch(tx, docs: List[Dict]):
+        rows = [Neo4jHandler._batch_row(doc) for doc in docs]
+
+        # Create Document nodes
         tx.run("""
-            MERGE (d:Document {id: $id})
-            SET d.filename = $filename,
-                d.path = $path,
-                d.language = $language,
-                d.page_count = $page_count,
-                d.content_length = $content_length,
-                d.summary = $summary,
-                d.ingested_at = $ingested_at
-        """, {
+            UNWIND $rows AS row
+            MERGE (d:Document {id: row.id})
+            SET d.filename = row.filename,
+                d.path = row.path,
+                d.language = row.language,
+                d.page_count = row.page_count,
+                d.content_length = row.content_length,
+                d.summary = row.summary,
+                d.ingested_at = row.ingested_at,
+                d.duplicate_paths = row.duplicate_paths
+        """, {"rows": rows})
+
+        # Create tag and entity nodes, one statement per label
+        for label, rel, key in RELATIONSHIPS:
+            pairs = [{"id": row["id"], "name": name} for row in rows for name in row[key]]
+            if not pairs:
+                continue
+            tx.run(f"""
+                UNWIND $pairs AS pair
+                MATCH (d:Document {{id: pair.id}})
+                MERGE (n:{label} {{name: pair.name}})
+                MERGE (d)-[:{rel}]->(n)
+            """, {"pairs": pairs})
+
+    @staticmethod
+    def _batch_row(doc: Dict) -> Dict:
+        entities = doc.get("entities", {})
+        return {
             "id": doc["id"],
             "filename": doc["filename"],
             "path": doc["relative_path"],
@@ -29,79 +154,13 @@ class Neo4jHandler:
             "page_count": doc["page_count"],
             "content_length": doc["content_length"],
             "summary": doc["overview_summary"],
-            "ingested_at": doc["ingested_at"]
-        })
-
-        # Create Client node
-        tx.run("""
-            MERGE (c:Client {name: $client})
-            MERGE (d:Document {id: $id})
-            MERGE (d)-[:BELONGS_TO]->(c)
-        """, {
-            "client": doc["tags"]["client"],
-            "id": doc["id"]
-        })
-
-        # Create Region node
-        tx.run("""
-            MERGE (r:Region {name: $region})
-            MERGE (d:Document {id: $id})
-            MERGE (d)-[:LOCATED_IN]->(r)
-        """, {
-            "region": doc["tags"]["region"],
-            "id": doc["id"]
-        })
-
-        # Create Domain node
-        tx.run("""
-            MERGE (dm:Domain {name: $domain})
-            MERGE (d:Document {id: $id})
-            MERGE (d)-[:PART_OF]->(dm)
-        """, {
-            "domain": doc["tags"]["domain"],
-            "id": doc["id"]
-        })
-
-        # Create Industry nodes
-        for industry in doc.get("industry_tags", {}).get("industries", []):
-            tx.run("""
-                MERGE (i:Industry {name: $industry})
-                MERGE (d:Document {id: $id})
-                MERGE (d)-[:TAGGED_AS]->(i)
-            """, {
-                "industry": industry,
-                "id": doc["id"]
-            })
-
-        # Create Technology nodes
-        for tech in doc.get("entities", {}).get("technologies", []):
-            tx.run("""
-                MERGE (t:Technology {name: $tech})
-                MERGE (d:Document {id: $id})
-                MERGE (d)-[:MENTIONS]->(t)
-            """, {
-                "tech": tech,
-                "id": doc["id"]
-            })
-
-        # Create Partner nodes
-        for partner in doc.get("entities", {}).get("partners", []):
-            tx.run("""
-                MERGE (p:Partner {name: $partner})
-                MERGE (d:Document {id: $id})
-                MERGE (d)-[:PARTNERED_WITH]->(p)
-            """, {
-                "partner": partner,
-                "id": doc["id"]
-            })
-
-        # Create Product nodes
-        for product in doc.get("entities", {}).get("products", []):
-            tx.run("""
-                MERGE (pr:Product {name: $product})
-                MERGE (d:Document {id: $id})
-                MERGE (d)-[:DESCRIBES]->(pr)
-            """, {
-                "product": product,
-                "id": doc["id"]
-            })
\ No newline at end of file
+            "ingested_at": doc["ingested_at"],
+            "duplicate_paths": doc.get("duplicate_paths", []),
+            "clients": [doc["tags"]["client"]],
+            "regions": [doc["tags"]["region"]],
+            "domains": [doc["tags"]["domain"]],
+            "industries": doc.get("industry_tags", {}).get("industries", []),
+            "technologies": entities.get("technologies", []),
+            "partners": entities.get("partners", []),
+            "products": entities.get("products", [])
+        }
@@ -1,22 +1,121 @@
-import json
+import os
 import csv
-from typing import List, Dict, Any
+import json
+import time
+from typing import List, Dict, Any, Iterable
+
+FORMATS = ("json", "ndjson", "csv")
 
 class OutputWriter:
-    def __init__(self, output_path: str, fmt: str, logger):
+    """Writes records one at a time as they are produced.
+
+    Output goes to `<output_path>.partial` and is fsynced every `fsync_every`
+    records or `fsync_interval` seconds; close() finishes the file and
+    atomically renames it over output_path. If the run fails, the previous
+    output is left untouched and the .partial file keeps every record written
+    so far (complete lines for ndjson/csv).
+
+    json is a compact array with one record per line; ndjson is one record
+    per line. Records differ in their keys (per file type, errors), so csv
+    spools records as ndjson lines in the .partial file and close() writes
+    the CSV with every key seen, in first-seen order.
+    """
+
+    def __init__(self, output_path: str, fmt: str, logger=None,
+                 fsync_every: int = 100, fsync_interval: float = 5.0):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown output format: {fmt}")
         self.output_path = output_path
+        self.partial_path = output_path + ".partial"
         self.fmt = fmt
         self.logger = logger
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._file = None
+        self._columns: Dict[str, None] = {}  # ordered set of csv columns
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
 
-    def write(self, metadata: List[Dict[str, Any]]):
+    def open(self) -> "OutputWriter":
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_path)), exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
         if self.fmt == "json":
-            with open(self.output_path, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-        elif self.fmt == "csv":
-            if metadata:
-                keys = metadata[0].keys()
-                with open(self.output_path, "w", newline="", encoding="utf-8") as f:
-                    writer = csv.DictWriter(f, fieldnames=keys)
-                    writer.writeheader()
-                    writer.writerows(metadata)
-        self.logger.info(f"Output written to {self.output_path}")
\ No newline at end of file
+            self._file.write("[")
+        return self
+
+    def write_record(self, record: Dict[str, Any]):
+        if self._file is None:
+            self.open()
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        if self.fmt == "json":
+            self._file.write(("\n" if self.count == 0 else ",\n") + line)
+        else:
+            self._file.write(line + "\n")
+            if self.fmt == "csv":
+                self._columns.update(dict.fromkeys(record))
+        self.count += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def write_records(self, records: Iterable[Dict[str, Any]]):
+        for record in records:
+            self.write_record(record)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Finish the file and move it into place."""
+        if self._file is None:
+            self.open()
+        if self.fmt == "json":
+            self._file.write("\n]\n" if self.count else "]\n")
+        self._sync()
+        self._file.close()
+        self._file = None
+        if self.fmt == "csv":
+            self._write_csv()
+        else:
+            os.replace(self.partial_path, self.output_path)
+        if self.logger is not None:
+            self.logger.info(f"Output written to {self.output_path} ({self.count} records)")
+
+    def _write_csv(self):
+        """Convert the spooled records to CSV with the union of their columns."""
+        csv_path = self.partial_path + ".csv"
+        with open(self.partial_path, "r", encoding="utf-8") as spool, \
+                open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self._columns))
+            writer.writeheader()
+            for line in spool:
+                writer.writerow(json.loads(line))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(csv_path, self.output_path)
+        os.remove(self.partial_path)
+
+    def abort(self):
+        """Stop without replacing the previous output; the .partial file is kept."""
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "OutputWriter":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, metadata: List[Dict[str, Any]]):
+        """Write a complete list in one go."""
+        with self:
+            self.write_records(metadata)
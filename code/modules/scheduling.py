@@ -0,0 +1,86 @@
+import os
+import re
+import asyncio
+import itertools
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Work lanes by extension; each lane has its own queue and workers so cheap
+# text files never wait behind large PDFs
+LANES = {
+    ".pdf": "pdf",
+    ".txt": "text",
+}
+
+DEFAULT_LANE_CONCURRENCY = {
+    "pdf": 8,
+    "text": 2,
+}
+
+# A page costs roughly this many bytes' worth of work on top of the file size
+PAGE_COST_BYTES = 32 * 1024
+
+# Bytes read from each end of a PDF when probing for its page count
+PROBE_BYTES = 64 * 1024
+
+_PAGES_COUNT = re.compile(rb"/Type\s*/Pages\b.{0,200}?/Count\s+(\d+)", re.DOTALL)
+_COUNT_PAGES = re.compile(rb"/Count\s+(\d+).{0,200}?/Type\s*/Pages\b", re.DOTALL)
+
+def probe_pdf_page_count(file_path: Path, probe_bytes: int = PROBE_BYTES) -> Optional[int]:
+    """Cheap page-count guess from the /Pages tree root near either end of the file.
+
+    Returns None when the page tree sits in a compressed object stream or in
+    the middle of the file; callers fall back to the file size.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(probe_bytes)
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            tail = b""
+            if size > probe_bytes:
+                f.seek(max(size - probe_bytes, probe_bytes))
+                tail = f.read()
+    except OSError:
+        return None
+    counts = [int(m) for chunk in (head, tail) for pattern in (_PAGES_COUNT, _COUNT_PAGES)
+              for m in pattern.findall(chunk)]
+    # The root of the page tree carries the largest /Count
+    return max(counts) if counts else None
+
+def estimate_cost(file_path: Path) -> Tuple[int, Optional[int]]:
+    """(estimated cost in byte-equivalents, probed page count or None)."""
+    try:
+        size = file_path.stat().st_size
+    except OSError:
+        return 0, None
+    pages = probe_pdf_page_count(file_path) if file_path.suffix.lower() == ".pdf" else None
+    return size + (pages or 0) * PAGE_COST_BYTES, pages
+
+class LaneQueues:
+    """One priority queue per lane, longest job first among the files queued so far."""
+
+    def __init__(self, lanes=LANES, maxsize: int = 0):
+        # maxsize > 0 bounds each lane: put() waits, which back-pressures the walker
+        self.lanes = lanes
+        self.queues: Dict[str, asyncio.PriorityQueue] = {
+            lane: asyncio.PriorityQueue(maxsize) for lane in set(lanes.values())
+        }
+        self._seq = itertools.count()  # FIFO among equal costs; paths never compared
+
+    def lane_for(self, file_path: Path) -> Optional[str]:
+        return self.lanes.get(file_path.suffix.lower())
+
+    async def put(self, lane: str, file_path: Path, cost: int):
+        await self.queues[lane].put((-cost, next(self._seq), file_path))
+
+    async def get(self, lane: str) -> Path:
+        _, _, file_path = await self.queues[lane].get()
+        return file_path
+
+    def task_done(self, lane: str):
+        self.queues[lane].task_done()
+
+    async def join(self):
+        for queue in self.queues.values():
+            await queue.join()
@@ -1,25 +1,60 @@
 import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, List, Tuple
 
 class AsyncDirectoryWalker:
-    def __init__(self, root_folder: str, file_callback: Callable, logger):
+    """Lists folders concurrently on a thread pool and streams files to file_callback.
+
+    file_callback is awaited for every file, so a bounded consumer queue (see
+    FileProcessor.enqueue_file) slows the scan down instead of buffering the tree.
+    """
+
+    def __init__(self, root_folder: str, file_callback: Callable, logger, scan_concurrency: int = 8):
         self.root_folder = Path(root_folder)
         self.file_callback = file_callback
         self.logger = logger
+        self.scan_concurrency = max(1, scan_concurrency)
+        self.folder_count = 0
 
     async def walk(self):
-        await self._walk_folder(self.root_folder)
+        loop = asyncio.get_running_loop()
+        folders: asyncio.Queue = asyncio.Queue()
+        folders.put_nowait(self.root_folder)
+
+        async def scanner():
+            while True:
+                folder = await folders.get()
+                try:
+                    self.logger.info(f"Entering folder: {folder}")
+                    subfolders, files = await loop.run_in_executor(pool, self._scan, folder)
+                    self.folder_count += 1
+                    for subfolder in subfolders:
+                        folders.put_nowait(subfolder)
+                    for path in files:
+                        await self.file_callback(path)
+                except Exception as e:
+                    self.logger.error(f"Error traversing {folder}: {e}")
+                finally:
+                    folders.task_done()
+
+        with ThreadPoolExecutor(max_workers=self.scan_concurrency, thread_name_prefix="scan") as pool:
+            tasks = [asyncio.create_task(scanner()) for _ in range(self.scan_concurrency)]
+            try:
+                await folders.join()
+            finally:
+                for t in tasks:
+                    t.cancel()
 
-    async def _walk_folder(self, folder: Path):
-        self.logger.info(f"Entering folder: {folder}")
-        try:
-            for entry in os.scandir(folder):
-                path = Path(entry.path)
+    @staticmethod
+    def _scan(folder: Path) -> Tuple[List[Path], List[Path]]:
+        """Blocking listing of one folder; runs on the scan pool."""
+        subfolders, files = [], []
+        with os.scandir(folder) as entries:
+            for entry in entries:
                 if entry.is_dir(follow_symlinks=False):
-                    await self._walk_folder(path)
+                    subfolders.append(Path(entry.path))
                 elif entry.is_file(follow_symlinks=False):
-                    await self.file_callback(path)
-        except Exception as e:
-            self.logger.error(f"Error traversing {folder}: {e}")
\ No newline at end of file
+                    files.append(Path(entry.path))
+        return subfolders, files
\ No newline at end of file
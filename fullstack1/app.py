@@ -1,22 +1,41 @@
 import os
 import json
-import asyncio
 import time
-import hashlib
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from datetime import datetime, timezone
-from typing import List
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+STARTUP_STARTED = time.perf_counter()
 
 from flask import (
     Flask, jsonify, render_template, request,
     redirect, url_for, send_from_directory, session
 )
 import fitz  # PyMuPDF
-from langdetect import detect
 from werkzeug.utils import secure_filename
 
-from neo4j import GraphDatabase
-from modules.neo4j_handler import Neo4jHandler
+from modules.neo4j_handler import Neo4jHandler, DEFAULT_BATCH_SIZE
 from modules import metadata_extractors  # async enrich_text(text, page_count)
+from modules.pdf_extraction import (
+    extract_pdf_file, stream_pdf_file, init_worker, process_pdf_file, TEXT_EXTRACTOR_VERSION,
+    DEFAULT_PAGE_SPLIT_THRESHOLD, should_split, page_ranges, extract_page_range, LANGDETECT, iter_pdf_pages,
+    extract_pdf_pages
+)
+from modules.hashing import HashCache, DEFAULT_HASH_ALGORITHM
+from modules.extraction_cache import ExtractionCache, DEFAULT_CACHE_MAX_BYTES, config_version
+from modules.jobs import JobManager, JobAlreadyRunning, IngestJob
+from modules.incremental import load_previous, index_by_path, reusable_entry, plan_incremental
+from modules.lazy import LazyResource, warm_up, load_timings
+from modules.scheduler import BoundedScheduler, STALLED
+from modules.output_writer import OutputWriter
+from modules.passage_index import PassageIndex, PassageIndexBuilder, split_passages, PASSAGE_VERSION
+from modules.vector_index import VectorIndex, get_embedder
+from modules.rfp_matching import SignatureIndex, SignatureIndexBuilder, document_profile
+from modules.dedup import plan_exact_duplicates, copy_record, near_duplicate_links
+from modules.record_index import RecordIndex, values_at, DEFAULT_PER_PAGE
 
 # -----------------------------
 # App config
@@ -41,8 +60,147 @@ NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "graph@123"
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
-handler = Neo4jHandler(driver)
+# Documents per Neo4j write transaction during /ingest
+GRAPH_BATCH_SIZE = DEFAULT_BATCH_SIZE
+
+# spaCy batching for the corpus-level enrichment stage of /ingest. Micro-batches
+# are piped in-process: nlp.pipe(n_process > 1) would start and tear down a
+# process pool per batch, so use backend=process to enrich on several cores.
+NLP_BATCH_SIZE = metadata_extractors.NLP_BATCH_SIZE
+
+# spaCy pipeline profile (see metadata_extractors.PIPELINE_PROFILES): picks the
+# model and drops components the profile's extractors do not use. Set the
+# default with `python app.py --nlp_profile ...`; /ingest?nlp_profile=... applies
+# to that run only. Each profile keeps its own pipeline and cached records.
+NLP_PROFILE = metadata_extractors.DEFAULT_PROFILE
+
+# Execution backend for /ingest: "thread" (asyncio threads + batched nlp.pipe)
+# or "process" (one PDF per task on a process pool, spaCy loaded once per worker)
+EXECUTION_BACKEND = "thread"
+EXECUTION_BACKENDS = ("thread", "process")
+PROCESS_WORKERS = os.cpu_count() or 1
+
+# Extraction mode: "full" keeps each document's whole text for batched nlp.pipe;
+# "streaming" reads and enriches page by page so memory per document is bounded
+# (use it for very large PDFs)
+EXTRACTION_MODE = "full"
+EXTRACTION_MODES = ("full", "streaming")
+
+# PDFs with at least this many pages are extracted as page ranges on several
+# worker processes and stitched back in order (0 = never split). Not used in
+# streaming mode, which never holds a document's whole text.
+PAGE_SPLIT_THRESHOLD = DEFAULT_PAGE_SPLIT_THRESHOLD
+
+# Scheduling of /ingest documents: at most MAX_CONCURRENT_DOCS in flight and at
+# most MEMORY_BUDGET_BYTES of source files (by file_size_bytes) admitted at once,
+# largest first; a file bigger than the budget runs alone. The thread backend
+# enriches completed texts in micro-batches of ENRICH_BATCH_DOCS.
+MAX_CONCURRENT_DOCS = 8
+MEMORY_BUDGET_BYTES = 1024 * 1024 * 1024
+ENRICH_BATCH_DOCS = 32
+
+# Digest used for document ids; see modules/hashing.py before changing it
+FILE_HASH_ALGORITHM = DEFAULT_HASH_ALGORITHM
+
+# Persistent extraction cache, keyed by file hash + extractor version.
+# "text" entries hold raw PyMuPDF output; "record" entries hold extracted fields
+# plus enrichment (per NLP profile), so an NLP config change still reuses the
+# extracted text.
+EXTRACTION_CACHE_PATH = os.path.join(METADATA_DIR, "extraction_cache.sqlite")
+EXTRACTION_CACHE_MAX_BYTES = DEFAULT_CACHE_MAX_BYTES
+TEXT_CACHE_VERSION = config_version(TEXT_EXTRACTOR_VERSION)
+
+def record_cache_key(profile: Optional[str] = None) -> Tuple[str, str]:
+    """Cache kind and version of "record" entries; each NLP profile keeps its own."""
+    profile = profile or metadata_extractors.current_profile()
+    return f"record:{profile}", config_version(TEXT_CACHE_VERSION, metadata_extractors.extractor_config(profile), 1500)
+
+# BM25 passage index for /chatbot, rebuilt at the end of an ingest (an
+# incremental one only if some document changed).
+# "passages" cache entries keep each document's page-aligned passages.
+PASSAGE_INDEX_DIR = os.path.join(METADATA_DIR, "passage_index")
+PASSAGE_CACHE_VERSION = config_version(TEXT_EXTRACTOR_VERSION, PASSAGE_VERSION)
+CHATBOT_TOP_K = 5
+
+# Dense passage vectors for semantic matching; kept in step with the sitemap by
+# appending new documents and deleting removed ones. Changing the embedder
+# (see modules/vector_index.EMBEDDERS) rebuilds the index on the next ingest.
+VECTOR_INDEX_DIR = os.path.join(METADATA_DIR, "vector_index")
+EMBEDDER = "hashing"
+
+# Per-document signatures (keyword/industry vectors, MinHash sketch, entity
+# profile) rebuilt with the other indexes; /upload_rfp ranks past responses
+# against them without reopening any corpus PDF.
+RFP_SIGNATURES_PATH = os.path.join(METADATA_DIR, "rfp_signatures.npz")
+RFP_MATCH_TOP_K = 10
+
+def open_extraction_cache() -> ExtractionCache:
+    """Open the cache and drop entries written under other extractor versions.
+
+    Runs on the first ingest rather than at import, so process-pool workers
+    (which re-import this module) and tests never touch the database.
+    """
+    cache = ExtractionCache(EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_MAX_BYTES)
+    cache.invalidate("text", TEXT_CACHE_VERSION)
+    cache.invalidate("passages", PASSAGE_CACHE_VERSION)
+    for profile in metadata_extractors.PIPELINE_PROFILES:
+        cache.invalidate(*record_cache_key(profile))
+    return cache
+
+extraction_cache = LazyResource("extraction_cache", open_extraction_cache)
+
+def configure_nlp(profile: str):
+    """Set the default spaCy pipeline profile (used unless an ingest asks for another)."""
+    global NLP_PROFILE
+    metadata_extractors.use_profile(profile)
+    NLP_PROFILE = profile
+
+# Load the NLP pipeline, langdetect profiles and graph driver in a background
+# thread at startup instead of on the first request that needs them
+WARM_UP = False
+
+def connect_graph():
+    from neo4j import GraphDatabase  # deferred until the first graph route
+    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+graph_driver = LazyResource("neo4j_driver", connect_graph)
+graph_handler = LazyResource("neo4j_handler", lambda: Neo4jHandler(graph_driver.get()))
+passage_index = LazyResource("passage_index", lambda: PassageIndex.open(PASSAGE_INDEX_DIR))
+vector_index = LazyResource("vector_index", lambda: VectorIndex(VECTOR_INDEX_DIR, get_embedder(EMBEDDER)))
+rfp_index = LazyResource("rfp_index", lambda: SignatureIndex.open(RFP_SIGNATURES_PATH))
+
+# In-memory copies of metadata.json / sitemap.json for the query API and the
+# /view_* routes; each is re-read only after the file changes
+metadata_index = RecordIndex(
+    os.path.join(METADATA_DIR, "metadata.json"),
+    facets={
+        "tag": values_at("tags.domain", "tags.region", "tags.client"),
+        "domain": values_at("tags.domain"),
+        "region": values_at("tags.region"),
+        "client": values_at("tags.client"),
+        "industry": values_at("industry_tags.industries"),
+        "technology": values_at("entities.technologies"),
+        "language": values_at("language")
+    },
+    date=lambda record: record.get("last_modified")
+)
+sitemap_index = RecordIndex(
+    os.path.join(SITEMAP_DIR, "sitemap.json"),
+    facets={
+        "tag": values_at("domain", "region", "client"),
+        "domain": values_at("domain"),
+        "region": values_at("region"),
+        "client": values_at("client")
+    },
+    date=lambda entry: entry.get("last_modified")
+)
+
+# Left out of /api/metadata items unless asked for with fields=...
+METADATA_LIST_EXCLUDE = ("content_preview",)
+schema_report = None  # set by ensure_graph_schema()
+
+# Background ingest jobs (one at a time)
+jobs = JobManager()
 
 # -----------------------------
 # Utility functions
@@ -55,15 +213,14 @@ def infer_tags(path: str):
         "client": parts[2] if len(parts) > 2 else "Unknown"
     }
 
-def file_hash(path: str) -> str:
-    with open(path, "rb") as f:
-        return hashlib.md5(f.read()).hexdigest()
-
-def detect_language(text: str) -> str:
-    try:
-        return detect(text)
-    except Exception:
-        return "unknown"
+def ensure_graph_schema(force: bool = False) -> dict:
+    """Create graph constraints once per process (before the first ingest)."""
+    global schema_report
+    if schema_report is None or force:
+        schema_report = graph_handler.get().ensure_schema()
+        print(f"Graph schema ready: {len(schema_report['indexes'])} indexes, "
+              f"missing constraints: {schema_report['missing_constraints'] or 'none'}")
+    return schema_report
 
 def generate_quick_overview(text: str, max_chars: int = 500) -> str:
     return text.strip().replace("\n", " ")[:max_chars]
@@ -71,7 +228,15 @@ def generate_quick_overview(text: str, max_chars: int = 500) -> str:
 # -----------------------------
 # Sitemap builder
 # -----------------------------
-def build_sitemap(root_folder: str) -> List[dict]:
+def build_sitemap(root_folder: str, previous: Optional[List[dict]] = None,
+                  hashes: Optional[HashCache] = None) -> List[dict]:
+    """Walk root_folder for PDFs.
+
+    With a previous sitemap, files whose size and mtime are unchanged reuse the
+    stored entry instead of being re-hashed and re-opened.
+    """
+    previous_by_path = index_by_path(previous or [])
+    hashes = hashes or HashCache(FILE_HASH_ALGORITHM)
     entries = []
     for dirpath, _, filenames in os.walk(root_folder):
         print(f"Scanning: {dirpath}, found {len(filenames)} files")
@@ -84,6 +249,11 @@ def build_sitemap(root_folder: str) -> List[dict]:
             rel_path = os.path.relpath(full_path, root_folder)
             tags = infer_tags(rel_path)
             stat = os.stat(full_path)
+            last_modified = datetime.fromtimestamp(stat.st_mtime).isoformat()
+            prior = previous_by_path.get(rel_path)
+            if reusable_entry(prior, stat.st_size, last_modified):
+                entries.append(dict(prior, absolute_path=full_path))
+                continue
             try:
                 with fitz.open(full_path) as doc:
                     page_count = doc.page_count
@@ -91,8 +261,10 @@ def build_sitemap(root_folder: str) -> List[dict]:
             except Exception:
                 page_count = 0
                 text = ""
+            hash_val = hashes.get(full_path)
             entries.append({
-                "id": file_hash(full_path)[:12],
+                "id": hash_val[:12],
+                "hash": hash_val,
                 "filename": fname,
                 "absolute_path": full_path,
                 "relative_path": rel_path,
@@ -101,7 +273,7 @@ def build_sitemap(root_folder: str) -> List[dict]:
                 "region": tags["region"],
                 "client": tags["client"],
                 "file_size_bytes": stat.st_size,
-                "last_modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "last_modified": last_modified,
                 "page_count": page_count,
                 "quick_overview": generate_quick_overview(text)
             })
@@ -109,48 +281,11 @@ def build_sitemap(root_folder: str) -> List[dict]:
     return entries
 
 # -----------------------------
-# PDF metadata extractor
+# PDF processing
 # -----------------------------
-def extract_pdf_text(file_path: str) -> str:
-    text_chunks = []
-    with fitz.open(file_path) as doc:
-        for page in doc:
-            text_chunks.append(page.get_text("text"))
-    return "\n".join(text_chunks)
-
-def extract_pdf_metadata(file_path: str) -> dict:
-    props = {}
-    try:
-        stat = os.stat(file_path)
-        props["file_size_bytes"] = stat.st_size
-        props["created_time"] = datetime.fromtimestamp(stat.st_ctime).isoformat()
-        props["modified_time"] = datetime.fromtimestamp(stat.st_mtime).isoformat()
-    except Exception as e:
-        props["fs_meta_error"] = str(e)
-
-    try:
-        with fitz.open(file_path) as doc:
-            props["page_count"] = doc.page_count
-            props["pdf_metadata"] = doc.metadata or {}
-    except Exception as e:
-        props["pdf_meta_error"] = str(e)
-
-    return props
-
-async def process_pdf(entry: dict, root_folder: str, preview_chars: int = 1500) -> dict:
-    full_path = os.path.join(root_folder, entry["relative_path"])
-    start = time.time()
-    try:
-        text = await asyncio.to_thread(extract_pdf_text, full_path)
-        props = await asyncio.to_thread(extract_pdf_metadata, full_path)
-        lang = detect_language(text)
-        hash_val = file_hash(full_path)
-        enrichment = await metadata_extractors.enrich_text(text, props.get("page_count", 0))
-    except Exception as e:
-        return {"error": str(e), "filename": entry.get("filename", "unknown")}
-
-    elapsed = round(time.time() - start, 3)
-
+def build_record(entry: dict, extracted: dict) -> dict:
+    props = extracted["props"]
+    hash_val = extracted["hash"]
     return {
         "id": hash_val[:12],
         "filename": entry["filename"],
@@ -164,23 +299,384 @@ async def process_pdf(entry: dict, root_folder: str, preview_chars: int = 1500)
         "file_size_bytes": props.get("file_size_bytes"),
         "last_modified": props.get("modified_time"),
         "page_count": props.get("page_count"),
-        "content_length": len(text),
+        "content_length": extracted["content_length"],
         "pdf_metadata": props.get("pdf_metadata"),
         "hash": hash_val,
-        "language": lang,
+        "language": extracted["language"],
         "ingested_at": datetime.now(timezone.utc).isoformat(),
-        "content_preview": text[:preview_chars],
+        "content_preview": extracted["content_preview"],
+        "extraction_time_sec": extracted["extraction_time_sec"]
+    }
+
+def cache_get(cache: Optional[ExtractionCache], kind: str, entry: dict, version: str):
+    if cache is None or not entry.get("hash"):
+        return None
+    return cache.get(kind, entry["hash"], version)
+
+def cache_put(cache: Optional[ExtractionCache], kind: str, entry: dict, version: str, value):
+    if cache is not None and entry.get("hash"):
+        cache.put(kind, entry["hash"], version, value)
+
+def cache_text(cache: Optional[ExtractionCache], entry: dict, pages: List[str]) -> str:
+    """Cache a freshly extracted document's text and its passages; returns the text.
+
+    The "text" entry keeps the page lengths, so the pages (and passages) can be
+    rebuilt from it later without reopening the PDF.
+    """
+    text = "\n".join(pages)
+    if cache is not None:
+        cache_put(cache, "text", entry, TEXT_CACHE_VERSION, {"text": text, "page_lengths": [len(p) for p in pages]})
+        cache_put(cache, "passages", entry, PASSAGE_CACHE_VERSION, {"passages": split_passages(pages)})
+    return text
+
+def cached_pages(cached: Optional[dict]) -> Optional[List[str]]:
+    """Page texts of a "text" cache entry, or None if it predates page lengths."""
+    if cached is None or "page_lengths" not in cached:
+        return None
+    pages, start = [], 0
+    for length in cached["page_lengths"]:
+        pages.append(cached["text"][start:start + length])
+        start += length + 1
+    return pages
+
+def extract_with_cache(full_path: str, entry: dict, preview_chars: int,
+                       cache: Optional[ExtractionCache] = None):
+    cached = cache_get(cache, "text", entry, TEXT_CACHE_VERSION)
+    if cached is not None:
+        return extract_pdf_file(full_path, preview_chars, entry.get("hash"), text=cached["text"])
+    text = cache_text(cache, entry, list(iter_pdf_pages(full_path)))
+    return extract_pdf_file(full_path, preview_chars, entry.get("hash"), text=text)
+
+async def extract_split_pages(full_path: str, page_count: int, pool: ProcessPoolExecutor) -> List[str]:
+    """Extract disjoint page ranges on the pool in parallel; returns the page texts in order."""
+    loop = asyncio.get_running_loop()
+    parts = await asyncio.gather(*[
+        loop.run_in_executor(pool, extract_page_range, full_path, start, stop)
+        for start, stop in page_ranges(page_count)
+    ])
+    return [page for part in parts for page in part]
+
+async def extract_document(entry: dict, root_folder: str, preview_chars: int = 1500,
+                           cache: Optional[ExtractionCache] = None,
+                           page_pool: Optional[ProcessPoolExecutor] = None,
+                           split_pages: int = PAGE_SPLIT_THRESHOLD):
+    """Extract text and file metadata; returns (extracted fields, text) without NLP enrichment.
+
+    With a page_pool, documents of split_pages pages or more are extracted range by range.
+    """
+    full_path = os.path.join(root_folder, entry["relative_path"])
+    if page_pool is None or not should_split(entry.get("page_count"), split_pages):
+        return await asyncio.to_thread(extract_with_cache, full_path, entry, preview_chars, cache)
+    cached = cache_get(cache, "text", entry, TEXT_CACHE_VERSION)
+    if cached is not None:
+        text = cached["text"]
+    else:
+        text = cache_text(cache, entry, await extract_split_pages(full_path, entry["page_count"], page_pool))
+    return await asyncio.to_thread(extract_pdf_file, full_path, preview_chars, entry.get("hash"), text)
+
+def apply_enrichment(record: dict, enrichment: dict) -> dict:
+    extraction_time = record.pop("extraction_time_sec", None)
+    record.update({
         "overview_summary": enrichment["content_summary"]["summary"],
         "content_summary": enrichment["content_summary"],
         "classification": enrichment["classification"],
         "industry_tags": enrichment["industry_tags"],
         "entities": enrichment["entities"],
-        "extraction_time_sec": elapsed
-    }
+        "extraction_time_sec": extraction_time
+    })
+    return record
+
+def report(progress: Optional[Callable[[str, int], None]], stage: str, n: int = 1):
+    if progress is not None and n:
+        progress(stage, n)
+
+def make_scheduler(concurrency: int = MAX_CONCURRENT_DOCS,
+                   memory_budget: int = MEMORY_BUDGET_BYTES) -> BoundedScheduler:
+    """Admission is costed by file size from the sitemap; largest files start first."""
+    return BoundedScheduler(concurrency, memory_budget, cost=lambda entry: entry.get("file_size_bytes") or 0)
+
+async def enrich_in_pool(entries: List[dict], root_folder: str, workers: int = PROCESS_WORKERS,
+                         progress: Optional[Callable[[str, int], None]] = None,
+                         streaming: bool = False, split_pages: int = PAGE_SPLIT_THRESHOLD,
+                         scheduler: Optional[BoundedScheduler] = None,
+                         cache: Optional[ExtractionCache] = None) -> AsyncIterator[Tuple[int, object]]:
+    """One PDF per pool task; yields (index, (extracted, enrichment) or exception) as tasks finish.
+
+    Large PDFs are first extracted as page ranges on the same pool, so their
+    pages spread over every worker instead of pinning one. Cached text is sent
+    to the worker instead of re-extracting; freshly extracted pages come back
+    and are cached (text and passages). Streaming mode never holds the whole
+    text, so it neither reads nor fills the text cache.
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = scheduler or make_scheduler(concurrency=workers * 2)
+
+    async def run(entry: dict):
+        full_path = os.path.join(root_folder, entry["relative_path"])
+        try:
+            text = None
+            if not streaming:
+                cached = cache_get(cache, "text", entry, TEXT_CACHE_VERSION)
+                if cached is not None:
+                    text = cached["text"]
+                elif should_split(entry.get("page_count"), split_pages):
+                    pages = await extract_split_pages(full_path, entry["page_count"], pool)
+                    text = await asyncio.to_thread(cache_text, cache, entry, pages)
+            return_pages = cache is not None and text is None and not streaming
+            extracted = await loop.run_in_executor(
+                pool, process_pdf_file, full_path, 1500, entry.get("hash"), streaming, text, return_pages
+            )
+            if "pages" in extracted:
+                await asyncio.to_thread(cache_text, cache, entry, extracted.pop("pages"))
+            return extracted, extracted.pop("enrichment")
+        finally:
+            report(progress, "extract")
+            report(progress, "enrich")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(metadata_extractors.current_profile(),)) as pool:
+        async for i, outcome in scheduler.run(entries, run):
+            yield i, outcome
+
+async def extract_and_enrich(entries: List[dict], root_folder: str,
+                             batch_size: int = NLP_BATCH_SIZE,
+                             cache: Optional[ExtractionCache] = None,
+                             progress: Optional[Callable[[str, int], None]] = None,
+                             workers: int = PROCESS_WORKERS, split_pages: int = PAGE_SPLIT_THRESHOLD,
+                             scheduler: Optional[BoundedScheduler] = None,
+                             enrich_batch_docs: int = ENRICH_BATCH_DOCS) -> AsyncIterator[Tuple[int, object]]:
+    """Thread backend; yields (index, (extracted, enrichment) or exception) per entry.
+
+    Texts are extracted under the scheduler and enriched in micro-batches of
+    enrich_batch_docs through nlp.pipe. A document's text counts against the
+    memory budget until its batch is enriched, then it is dropped.
+    """
+    scheduler = scheduler or make_scheduler()
+
+    async def extract(entry: dict):
+        try:
+            return await extract_document(entry, root_folder, cache=cache,
+                                          page_pool=page_pool, split_pages=split_pages)
+        finally:
+            report(progress, "extract")
+
+    async def enrich(batch: List[Tuple[int, tuple]]) -> List[Tuple[int, object]]:
+        texts = [text for _, (_, text) in batch]
+        page_counts = [extracted["props"].get("page_count") or 0 for _, (extracted, _) in batch]
+        try:
+            enrichments = await asyncio.to_thread(
+                metadata_extractors.enrich_texts, texts, page_counts, batch_size, 1
+            )
+        except Exception as e:
+            enrichments = [e] * len(batch)
+        report(progress, "enrich", len(batch))
+        for i, _ in batch:
+            scheduler.release(i)
+        return [
+            (i, enrichment if isinstance(enrichment, Exception) else (extracted, enrichment))
+            for (i, (extracted, _)), enrichment in zip(batch, enrichments)
+        ]
+
+    # Page ranges of large PDFs go to a process pool, only if there are any
+    page_pool = None
+    if any(should_split(entry.get("page_count"), split_pages) for entry in entries):
+        page_pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        batch = []
+        async for i, outcome in scheduler.run(entries, extract, hold=True):
+            if outcome is STALLED:
+                # The held texts fill the memory budget: enrich what we have to free it
+                if batch:
+                    for item in await enrich(batch):
+                        yield item
+                    batch = []
+                continue
+            if isinstance(outcome, Exception):
+                scheduler.release(i)
+                report(progress, "enrich")
+                yield i, outcome
+                continue
+            batch.append((i, outcome))
+            if len(batch) >= enrich_batch_docs:
+                for item in await enrich(batch):
+                    yield item
+                batch = []
+        if batch:
+            for item in await enrich(batch):
+                yield item
+    finally:
+        if page_pool is not None:
+            page_pool.shutdown()
+
+async def stream_documents(entries: List[dict], root_folder: str,
+                           progress: Optional[Callable[[str, int], None]] = None,
+                           scheduler: Optional[BoundedScheduler] = None) -> AsyncIterator[Tuple[int, object]]:
+    """Streaming mode on threads; yields (index, (extracted, enrichment) or exception) per entry."""
+    scheduler = scheduler or make_scheduler()
 
-async def process_all_pdfs(sitemap: List[dict], root_folder: str):
-    tasks = [process_pdf(entry, root_folder) for entry in sitemap]
-    return await asyncio.gather(*tasks)
+    async def stream(entry: dict):
+        try:
+            full_path = os.path.join(root_folder, entry["relative_path"])
+            extracted = await asyncio.to_thread(stream_pdf_file, full_path, 1500, entry.get("hash"))
+            return extracted, extracted.pop("enrichment")
+        finally:
+            report(progress, "extract")
+            report(progress, "enrich")
+
+    async for i, outcome in scheduler.run(entries, stream):
+        yield i, outcome
+
+async def iter_processed_pdfs(sitemap: List[dict], root_folder: str,
+                              batch_size: int = NLP_BATCH_SIZE,
+                              backend: str = EXECUTION_BACKEND, workers: int = PROCESS_WORKERS,
+                              cache: Optional[ExtractionCache] = None,
+                              progress: Optional[Callable[[str, int], None]] = None,
+                              mode: str = EXTRACTION_MODE, split_pages: int = PAGE_SPLIT_THRESHOLD,
+                              concurrency: int = MAX_CONCURRENT_DOCS,
+                              memory_budget: int = MEMORY_BUDGET_BYTES) -> AsyncIterator[Tuple[int, dict]]:
+    """Yields (sitemap index, record) as each document completes, cached ones first.
+
+    progress(stage, n) is called as documents finish the "extract" and "enrich" stages.
+    """
+    # Documents already extracted and enriched under the current config skip all work
+    record_kind, record_version = record_cache_key()
+    todo = []
+    for i, entry in enumerate(sitemap):
+        cached = cache_get(cache, record_kind, entry, record_version)
+        if cached is None:
+            todo.append(i)
+            continue
+        report(progress, "extract")
+        report(progress, "enrich")
+        yield i, apply_enrichment(build_record(entry, cached["extracted"]), cached["enrichment"])
+
+    entries = [sitemap[i] for i in todo]
+    if backend == "process":
+        scheduler = make_scheduler(max(concurrency, workers), memory_budget)
+        outcomes = enrich_in_pool(entries, root_folder, workers, progress, streaming=mode == "streaming",
+                                  split_pages=split_pages, scheduler=scheduler, cache=cache)
+    elif mode == "streaming":
+        outcomes = stream_documents(entries, root_folder, progress, make_scheduler(concurrency, memory_budget))
+    else:
+        outcomes = extract_and_enrich(entries, root_folder, batch_size, cache, progress,
+                                      workers=workers, split_pages=split_pages,
+                                      scheduler=make_scheduler(concurrency, memory_budget))
+
+    async for j, outcome in outcomes:
+        entry = entries[j]
+        if isinstance(outcome, Exception):
+            yield todo[j], {"error": str(outcome), "filename": entry.get("filename", "unknown")}
+            continue
+        cache_put(cache, record_kind, entry, record_version,
+                  {"extracted": outcome[0], "enrichment": outcome[1]})
+        yield todo[j], apply_enrichment(build_record(entry, outcome[0]), outcome[1])
+
+# -----------------------------
+# Retrieval indexes
+# -----------------------------
+def document_passages(entry: dict, root_folder: str, cache: Optional[ExtractionCache] = None) -> List[dict]:
+    """Page-aligned passages of one document.
+
+    They are normally cached at extraction; failing that they are split from the
+    cached text. The PDF is only reopened if neither is cached (e.g. after
+    streaming extraction, which never holds the whole text).
+    """
+    cached = cache_get(cache, "passages", entry, PASSAGE_CACHE_VERSION)
+    if cached is not None:
+        return cached["passages"]
+    pages = cached_pages(cache_get(cache, "text", entry, TEXT_CACHE_VERSION))
+    if pages is None:
+        pages = iter_pdf_pages(os.path.join(root_folder, entry["relative_path"]))
+    passages = split_passages(pages)
+    cache_put(cache, "passages", entry, PASSAGE_CACHE_VERSION, {"passages": passages})
+    return passages
+
+def index_entries(sitemap: List[dict]) -> List[dict]:
+    """One entry per document id (byte-identical copies share one): the first by relative path."""
+    entries = {}
+    for entry in sorted(sitemap, key=lambda e: e["relative_path"]):
+        entries.setdefault(entry["id"], entry)
+    return list(entries.values())
+
+def indexes_current() -> bool:
+    """True if the passage, signature and vector indexes are built (current versions) over the same documents."""
+    passages, signatures = passage_index.get(), rfp_index.get()
+    if passages is None or signatures is None or passages.meta.get("version") != PASSAGE_VERSION:
+        return False
+    return {doc["id"] for doc in passages.docs} == vector_index.get().doc_ids()
+
+async def extract_missing_passages(entries: List[dict], root_folder: str, cache: Optional[ExtractionCache],
+                                   backend: str = EXECUTION_BACKEND, workers: int = PROCESS_WORKERS):
+    """Extract the documents with neither passages nor text cached, on the ingest backend.
+
+    This happens after streaming extraction or cache eviction; build_indexes
+    would otherwise reopen those PDFs one at a time on the job thread. Each
+    document's text and passages are cached as soon as it is extracted.
+    """
+    if cache is None:
+        return
+    missing = [
+        entry for entry in entries
+        if cache_get(cache, "passages", entry, PASSAGE_CACHE_VERSION) is None
+        and cache_get(cache, "text", entry, TEXT_CACHE_VERSION) is None
+    ]
+    if not missing:
+        return
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(max_workers=workers) if backend == "process" else None
+
+    async def extract(entry: dict):
+        full_path = os.path.join(root_folder, entry["relative_path"])
+        if pool is None:
+            pages = await asyncio.to_thread(extract_pdf_pages, full_path)
+        else:
+            pages = await loop.run_in_executor(pool, extract_pdf_pages, full_path)
+        await asyncio.to_thread(cache_text, cache, entry, pages)
+
+    scheduler = make_scheduler(MAX_CONCURRENT_DOCS if pool is None else max(MAX_CONCURRENT_DOCS, workers))
+    try:
+        async for i, outcome in scheduler.run(missing, extract):
+            if isinstance(outcome, Exception):
+                print(f"Passage index: could not extract {missing[i]['relative_path']}: {outcome}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def build_indexes(sitemap: List[dict], root_folder: str, cache: Optional[ExtractionCache] = None,
+                  progress: Optional[Callable[[str, int], None]] = None,
+                  profiles: Optional[dict] = None, moved_ids: Iterable[str] = ()) -> str:
+    """Rebuild the BM25 passage and RFP signature indexes and bring the vector index in line with the sitemap.
+
+    Unchanged documents reuse cached passages (see extract_missing_passages);
+    only documents missing from the vector index are embedded. Byte-identical
+    copies share an id and are indexed once, under the first path (the
+    canonical one); moved_ids are documents whose canonical path changed,
+    re-embedded under the new one. profiles maps document id to document_profile().
+    """
+    profiles = profiles or {}
+    builder = PassageIndexBuilder(PASSAGE_INDEX_DIR)
+    signatures = SignatureIndexBuilder(RFP_SIGNATURES_PATH)
+    vectors = vector_index.get()
+    current_ids = {entry["id"] for entry in sitemap}
+    vectors.delete((vectors.doc_ids() - current_ids) | set(moved_ids))
+    embedded = vectors.doc_ids()
+    for entry in index_entries(sitemap):
+        try:
+            passages = document_passages(entry, root_folder, cache)
+        except Exception as e:
+            print(f"Passage index: skipped {entry['relative_path']}: {e}")
+            passages = []
+        if passages:
+            doc = {"id": entry["id"], "filename": entry["filename"], "relative_path": entry["relative_path"]}
+            builder.add_document(doc, passages)
+            profile = profiles.get(doc["id"]) or document_profile(None)
+            signatures.add_document(doc, [p["text"] for p in passages], profile)
+            if doc["id"] not in embedded:
+                vectors.add_document(doc, passages)
+                embedded.add(doc["id"])
+        report(progress, "index")
+    vectors.commit()
+    signatures.save()
+    return builder.save()
 
 # -----------------------------
 # Auth (basic placeholder)
@@ -224,55 +720,294 @@ def user_panel():
 # -----------------------------
 # Admin actions
 # -----------------------------
-@app.route("/ingest", methods=["GET"])
-def ingest():
-    # Build sitemap
-    sitemap = build_sitemap(ROOT_FOLDER)
+def run_ingest(job: IngestJob, incremental: bool = False, backend: str = EXECUTION_BACKEND,
+               extraction: str = EXTRACTION_MODE, nlp_profile: Optional[str] = None) -> dict:
+    """
+    Full ingest by default; incremental only processes files that are new or
+    changed since the last run and removes deleted ones from the graph.
+    Runs on the job thread; progress and cancellation go through `job`.
+    nlp_profile applies to this run only (the default is NLP_PROFILE).
+    """
+    profile = nlp_profile or NLP_PROFILE
+
     sitemap_path = os.path.join(SITEMAP_DIR, "sitemap.json")
-    with open(sitemap_path, "w", encoding="utf-8") as f:
+    metadata_path = os.path.join(METADATA_DIR, "metadata.json")
+    cache = extraction_cache.get()
+
+    # Build sitemap
+    job.start_stage("sitemap", 0)
+    previous_sitemap = load_previous(sitemap_path) if incremental else None
+    hashes = HashCache(FILE_HASH_ALGORITHM)  # per-run: each file is hashed at most once
+    sitemap = build_sitemap(ROOT_FOLDER, previous=previous_sitemap, hashes=hashes)
+    job.advance("sitemap", len(sitemap))
+    job.finish_stage("sitemap")
+    # Written aside and renamed, so readers (e.g. /api/sitemap) never see a partial file
+    with open(sitemap_path + ".tmp", "w", encoding="utf-8") as f:
         json.dump(sitemap, f, indent=2, ensure_ascii=False)
+    os.replace(sitemap_path + ".tmp", sitemap_path)
+    job.check_cancelled()
 
-    # Async processing
-    results = asyncio.run(process_all_pdfs(sitemap, ROOT_FOLDER))
-    metadata_path = os.path.join(METADATA_DIR, "metadata.json")
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    previous_metadata = load_previous(metadata_path)
+    if incremental:
+        plan = plan_incremental(sitemap, previous_metadata)
+    else:
+        plan = {"to_process": sitemap, "unchanged": [], "deleted_ids": []}
+
+    # Byte-identical copies are extracted once; the others reuse that record.
+    # Reused records are regrouped too, as a copy may have become the canonical one.
+    exact = plan_exact_duplicates(plan["to_process"], sitemap, plan["unchanged"], previous_metadata)
+    to_process = exact["to_process"]
+    unchanged = exact["unchanged"]
+
+    # Graph schema and deletions first, so new documents can be written as they arrive
+    job.start_stage("extract", len(to_process))
+    job.start_stage("enrich", len(to_process))
+    job.start_stage("graph", len(to_process))
+    ensure_graph_schema()
+    # Nodes whose canonical file moved are rebuilt, as their path and tags change
+    stale_ids = sorted(set(plan["deleted_ids"]) | set(exact["moved_ids"]))
+    if stale_ids:
+        graph_handler.get().delete_documents(stale_ids)
+    if exact["regraph"]:
+        graph_handler.get().create_document_graphs(exact["regraph"], GRAPH_BATCH_SIZE)
+
+    summary = {"files_processed": 0, "errors": 0, "metadata_preview": [],
+               "exact_duplicates": len(unchanged) - len(plan["unchanged"])}
+    # Industries and entities per document, for the RFP signature index
+    profiles = {record["id"]: document_profile(record) for record in unchanged if "id" in record}
+
+    async def consume(writer: OutputWriter):
+        """Stream each finished record to metadata.json and, in batches, to Neo4j."""
+        batch = []
+
+        async def flush():
+            job.check_cancelled()
+            await asyncio.to_thread(graph_handler.get().create_document_graphs, batch, GRAPH_BATCH_SIZE)
+            job.advance("graph", len(batch))
+
+        async for i, record in iter_processed_pdfs(
+            to_process, ROOT_FOLDER, backend=backend, cache=cache,
+            progress=job.advance, mode=extraction
+        ):
+            job.check_cancelled()
+            path = to_process[i]["relative_path"]
+            if "error" not in record and path in exact["duplicate_paths"]:
+                record["duplicate_paths"] = exact["duplicate_paths"][path]
+            writer.write_record(record)
+            for entry in exact["copies"].get(path, []):
+                writer.write_record(copy_record(record, entry))
+                summary["exact_duplicates"] += 1
+            summary["files_processed"] += 1
+            if not summary["metadata_preview"]:
+                summary["metadata_preview"] = [record]
+            if "error" in record:
+                summary["errors"] += 1
+            if "error" in record or "id" not in record or "filename" not in record:
+                job.advance("graph")
+                continue
+            profiles[record["id"]] = document_profile(record)
+            batch.append(record)
+            if len(batch) >= GRAPH_BATCH_SIZE:
+                await flush()
+                batch = []
+        if batch:
+            await flush()
+
+    # metadata.json is replaced atomically once the run completes; records are
+    # written in completion order (reused ones first), not sitemap order
+    with OutputWriter(metadata_path, "json") as writer, metadata_extractors.run_profile(profile):
+        writer.write_records(unchanged)
+        asyncio.run(consume(writer))
+
+    # Retrieval indexes for /chatbot over the whole corpus, swapped in atomically.
+    # An incremental run that changed no document keeps the current ones.
+    job.check_cancelled()
+    entries = index_entries(sitemap)
+    job.start_stage("index", len(entries))
+    rebuild = not incremental or to_process or plan["deleted_ids"] or exact["moved_ids"] or not indexes_current()
+    links = None
+    if rebuild:
+        asyncio.run(extract_missing_passages(entries, ROOT_FOLDER, cache, backend))
+        build_indexes(sitemap, ROOT_FOLDER, cache, progress=job.advance, profiles=profiles,
+                      moved_ids=exact["moved_ids"])
+        passage_index.reset()
+        rfp_index.reset()
+
+        # Near-duplicate copies and revised drafts, found from the MinHash signatures just built
+        job.check_cancelled()
+        signatures = rfp_index.get()
+        modified = {entry["id"]: entry.get("last_modified") for entry in sitemap}
+        links = near_duplicate_links(signatures.docs, signatures.minhash, modified) if signatures else []
+        graph_handler.get().link_documents(links)
+    else:
+        job.advance("index", len(entries))
+
+    return {
+        "files_processed": summary["files_processed"],
+        "nlp_profile": profile,
+        "files_unchanged": len(plan["unchanged"]),
+        "documents_deleted": len(plan["deleted_ids"]),
+        "errors": summary["errors"],
+        "exact_duplicates": summary["exact_duplicates"],
+        "indexes_rebuilt": bool(rebuild),
+        "near_duplicate_links": len(links) if links is not None else None,
+        "sitemap_file": sitemap_path,
+        "metadata_file": metadata_path,
+        "metadata_preview": summary["metadata_preview"]
+    }
+
+@app.route("/ingest", methods=["GET", "POST"])
+def ingest():
+    """
+    Submits a background ingest job and returns its id right away.
+    Optional params: mode=incremental, backend=thread|process, extraction=full|streaming,
+    nlp_profile=<name from metadata_extractors.PIPELINE_PROFILES>.
+    """
+    params = {
+        "mode": request.values.get("mode", "full"),
+        "backend": request.values.get("backend", EXECUTION_BACKEND),
+        "extraction": request.values.get("extraction", EXTRACTION_MODE),
+        "nlp_profile": request.values.get("nlp_profile", NLP_PROFILE)
+    }
+    choices = {
+        "mode": ("full", "incremental"),
+        "backend": EXECUTION_BACKENDS,
+        "extraction": EXTRACTION_MODES,
+        "nlp_profile": sorted(metadata_extractors.PIPELINE_PROFILES)
+    }
+    for name, allowed in choices.items():
+        if params[name] not in allowed:
+            return jsonify({"error": f"Unknown {name} {params[name]!r}", "choices": list(allowed)}), 400
+    task = partial(
+        run_ingest,
+        incremental=params["mode"] == "incremental",
+        backend=params["backend"],
+        extraction=params["extraction"],
+        nlp_profile=params["nlp_profile"]
+    )
+    try:
+        job = jobs.submit(task, params)
+    except JobAlreadyRunning as e:
+        return jsonify({
+            "status": "already_running",
+            "job_id": e.job_id,
+            "status_url": url_for("ingest_job_status", job_id=e.job_id)
+        }), 409
+    return jsonify({
+        "status": "submitted",
+        "job_id": job.id,
+        "status_url": url_for("ingest_job_status", job_id=job.id),
+        "cancel_url": url_for("cancel_ingest_job", job_id=job.id)
+    }), 202
+
+@app.route("/ingest/jobs", methods=["GET"])
+def list_ingest_jobs():
+    return jsonify([job.snapshot() for job in jobs.list()])
+
+@app.route("/ingest/jobs/<job_id>", methods=["GET"])
+def ingest_job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.snapshot())
 
-    # Push to Neo4j
-    for doc in results:
-        if "id" in doc and "filename" in doc and "error" not in doc:
-            handler.create_document_graph(doc)
+@app.route("/ingest/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_ingest_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify({"status": "cancelling" if job.status in ("queued", "running") else job.status, "job_id": job.id})
 
-    preview = json.dumps(results[:1], indent=2, ensure_ascii=False)
+@app.route("/ingest/jobs/<job_id>/results", methods=["GET"])
+def ingest_job_results(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job.status != "completed":
+        return jsonify(job.snapshot()), 409
+    result = job.result
     return render_template(
         "results.html",
-        files_processed=len(results),
-        sitemap_file=sitemap_path,
-        metadata_file=metadata_path,
-        metadata_preview=preview
+        files_processed=result["files_processed"],
+        sitemap_file=result["sitemap_file"],
+        metadata_file=result["metadata_file"],
+        metadata_preview=json.dumps(result["metadata_preview"], indent=2, ensure_ascii=False)
     )
 
+def conditional_json(etag: str, build: Callable[[], object]):
+    """JSON response tagged with etag; 304 without building the body if the client has it."""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # always revalidate, cheap thanks to the ETag
+    return response
+
+QUERY_PARAMS = ("page", "per_page", "fields", "modified_from", "modified_to")
+
+def query_records(index: RecordIndex, missing: str, exclude=()):
+    """
+    Paginated, filtered view of a RecordIndex from the request args:
+    page, per_page, fields=a,b.c (projection), modified_from / modified_to
+    (ISO dates) and any facet of the index, repeatable (e.g. industry=Finance&industry=Retail).
+    """
+    if not index.refresh():
+        return jsonify({"error": missing}), 404
+    args = request.args
+    try:
+        page = int(args.get("page", 1))
+        per_page = int(args.get("per_page", DEFAULT_PER_PAGE))
+    except ValueError:
+        return jsonify({"error": "page and per_page must be integers"}), 400
+    filters = {name: args.getlist(name) for name in args if name not in QUERY_PARAMS}
+    unknown = sorted(set(filters) - set(index.facets))
+    if unknown:
+        return jsonify({"error": f"Unknown filter(s) {unknown}", "filters": sorted(index.facets)}), 400
+    fields = [name.strip() for name in args.get("fields", "").split(",") if name.strip()]
+    etag = index.etag(sorted(args.items(multi=True)))
+    return conditional_json(etag, lambda: index.query(
+        filters, args.get("modified_from"), args.get("modified_to"), page, per_page, fields, exclude
+    ))
+
+@app.route("/api/metadata", methods=["GET"])
+def api_metadata():
+    return query_records(metadata_index, "No metadata found. Run ingestion first.", METADATA_LIST_EXCLUDE)
+
+@app.route("/api/sitemap", methods=["GET"])
+def api_sitemap():
+    return query_records(sitemap_index, "No sitemap found. Run ingestion first.")
+
 @app.route("/view_sitemap", methods=["GET"])
 def view_sitemap():
-    path = os.path.join(SITEMAP_DIR, "sitemap.json")
-    if not os.path.exists(path):
+    if not sitemap_index.refresh():
         return jsonify({"error": "No sitemap found. Run ingestion first."}), 404
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return jsonify(data)
+    return conditional_json(sitemap_index.etag("all"), lambda: sitemap_index.records)
 
 @app.route("/view_metadata", methods=["GET"])
 def view_metadata():
-    path = os.path.join(METADATA_DIR, "metadata.json")
-    if not os.path.exists(path):
+    if not metadata_index.refresh():
         return jsonify({"error": "No metadata found. Run ingestion first."}), 404
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return jsonify(data)
+    return conditional_json(metadata_index.etag("all"), lambda: metadata_index.records)
+
+@app.route("/health", methods=["GET"])
+def health():
+    """Startup time and which lazy resources are loaded (with their load times)."""
+    return jsonify({
+        "status": "ok",
+        "startup_sec": STARTUP_SEC,
+        "loaded": {r.name: r.loaded for r in (*metadata_extractors.PIPELINES.values(), LANGDETECT, graph_driver,
+                                               extraction_cache, passage_index, vector_index, rfp_index)},
+        "load_timings_sec": load_timings()
+    })
+
+@app.route("/graph_schema", methods=["GET"])
+def graph_schema():
+    return jsonify(ensure_graph_schema(force=True))
 
 @app.route("/view_graph", methods=["GET"])
 def view_graph():
-    with driver.session() as session_db:
+    with graph_driver.get().session() as session_db:
         result = session_db.run("""
             MATCH (a)-[r]->(b)
             RETURN a, r, b LIMIT 200
@@ -355,7 +1090,9 @@ def upload_folder():
 @app.route("/upload_rfp", methods=["POST"])
 def upload_rfp():
     """
-    Handles user RFP upload (single PDF).
+    Handles user RFP upload (single PDF): saves it, extracts and enriches its
+    text and returns the most similar past responses from the signature index,
+    with their industry, entity and technology overlaps.
     """
     file = request.files.get("rfp_file")
     if file is None or file.filename == "":
@@ -365,14 +1102,42 @@ def upload_rfp():
         return jsonify({"status": "invalid_type", "message": "Only PDF allowed"}), 400
     dest_path = os.path.join(USER_RFP_DIR, filename)
     file.save(dest_path)
-    return jsonify({"status": "success", "saved_to": dest_path})
+
+    index = rfp_index.get()
+    if index is None:
+        rfp_index.reset()  # look again once an ingest has built it
+        return jsonify({"status": "no_index", "saved_to": dest_path,
+                        "message": "No documents are indexed yet. Run an ingest first."}), 503
+
+    start = time.perf_counter()
+    try:
+        pages = list(iter_pdf_pages(dest_path))
+        enrichment = metadata_extractors.enrich_text_sync("\n".join(pages), len(pages))
+    except Exception as e:
+        return jsonify({"status": "extraction_failed", "saved_to": dest_path, "error": str(e)}), 422
+    texts = [p["text"] for p in split_passages(pages)]
+    matches = index.match(texts, enrichment, k=RFP_MATCH_TOP_K)
+    profile = document_profile(enrichment)
+    return jsonify({
+        "status": "success",
+        "saved_to": dest_path,
+        "rfp": {
+            "page_count": len(pages),
+            "industries": enrichment["industry_tags"]["industries"],
+            "organizations": profile["organizations"],
+            "technologies": profile["technologies"]
+        },
+        "matches": matches,
+        "match_time_ms": round((time.perf_counter() - start) * 1000, 2)
+    })
 
 @app.route("/chatbot", methods=["GET", "POST"])
 def chatbot():
     """
     Basic chatbot page:
     - GET: render template
-    - POST: echo back message (placeholder to integrate Ollama later)
+    - POST: top passages for `message` (context for Ollama later); mode=keyword
+      (BM25 passage index, default) or mode=semantic (vector index)
     """
     if request.method == "GET":
         return render_template("chatbot.html")
@@ -382,9 +1147,27 @@ def chatbot():
     if not message:
         return jsonify({"status": "empty_message"}), 400
 
-    # Placeholder answer (wire Ollama here if needed)
-    answer = f"You asked: '{message}'. This is a placeholder response."
-    return jsonify({"status": "ok", "answer": answer})
+    mode = request.form.get("mode", "keyword")
+    if mode not in ("keyword", "semantic"):
+        return jsonify({"status": "bad_mode", "error": f"Unknown mode {mode!r}", "modes": ["keyword", "semantic"]}), 400
+    index = vector_index.get() if mode == "semantic" else passage_index.get()
+    if index is None or not len(index):
+        if mode == "keyword":
+            passage_index.reset()  # look again once an ingest has built it
+        # The vector index is never reset here: ingest appends to this same instance
+        return jsonify({"status": "no_index", "answer": "No documents are indexed yet. Run an ingest first."}), 503
+
+    start = time.perf_counter()
+    hits = index.search(message, k=CHATBOT_TOP_K)
+    query_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    # Retrieval only for now (wire Ollama here, using the passages as context)
+    if hits:
+        best = hits[0]
+        answer = f"Best match in {best['filename']} (page {best['page']}): {best['text']}"
+    else:
+        answer = f"No passages matched '{message}'."
+    return jsonify({"status": "ok", "mode": mode, "answer": answer, "passages": hits, "query_time_ms": query_ms})
 
 # -----------------------------
 # Static file serving convenience (optional)
@@ -396,8 +1179,25 @@ def static_files(filename):
 # -----------------------------
 # Run app
 # -----------------------------
+if WARM_UP:
+    warm_up([metadata_extractors.pipeline(), LANGDETECT, graph_driver], background=True)
+
+STARTUP_SEC = round(time.perf_counter() - STARTUP_STARTED, 3)
+print(f"App initialized in {STARTUP_SEC}s (NLP, langdetect and Neo4j load on first use)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knowledge management web app")
+    parser.add_argument("--nlp_profile", type=str, choices=sorted(metadata_extractors.PIPELINE_PROFILES),
+                        default=NLP_PROFILE, help="spaCy pipeline profile used for enrichment")
+    parser.add_argument("--warm_up", action="store_true",
+                        help="Load the NLP model, langdetect and the Neo4j driver in the background at startup")
+    args = parser.parse_args()
+    if args.nlp_profile != NLP_PROFILE:
+        configure_nlp(args.nlp_profile)
+    if args.warm_up and not WARM_UP:
+        warm_up([metadata_extractors.pipeline(), LANGDETECT, graph_driver], background=True)
     app.run(debug=True, port=5000)
 
 # When done:
-driver.close()
\ No newline at end of file
+if graph_driver.loaded:
+    graph_driver.get().close()
\ No newline at end of file
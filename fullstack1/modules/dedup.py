@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from modules.minhash import jaccard, lsh_candidate_pairs
+
+# Estimated Jaccard similarity of text shingles above which two different
+# files are linked: DUPLICATE_OF for near-identical copies, VERSION_OF for
+# revised drafts of the same document
+DUPLICATE_THRESHOLD = 0.9
+VERSION_THRESHOLD = 0.5
+
+# -----------------------------
+# Exact duplicates (before extraction)
+# -----------------------------
+def group_by_hash(entries: List[dict]) -> Dict[str, List[dict]]:
+    """Sitemap entries sharing a content hash, ordered by relative path."""
+    groups: Dict[str, List[dict]] = {}
+    for entry in sorted(entries, key=lambda e: e["relative_path"]):
+        if entry.get("hash"):
+            groups.setdefault(entry["hash"], []).append(entry)
+    return groups
+
+def plan_exact_duplicates(to_process: List[dict], sitemap: List[dict], unchanged: List[dict] = (),
+                          previous: List[dict] = ()) -> dict:
+    """Keep one entry per content hash for extraction.
+
+    Hash groups are recomputed over the whole sitemap on every run, so reused
+    records (`unchanged`, from an incremental plan) follow a copy appearing or
+    the canonical file changing or disappearing. `previous` is the last run's
+    metadata, used to spot documents whose canonical path moved.
+
+    Returns a dict with:
+      to_process      - entries to extract, one per hash (the first by relative path)
+      copies          - canonical relative path -> the skipped byte-identical entries
+      duplicate_paths - canonical relative path -> every other path with the same content
+      unchanged       - reused records with duplicate_of / duplicate_paths brought up to date,
+                        plus records for new copies of reused documents
+      regraph         - reused canonical records whose Document node must be rewritten
+      moved_ids       - document ids whose canonical path is not the one of the last run
+    """
+    groups = group_by_hash(sitemap)
+    canonical_of: Dict[str, str] = {}
+    duplicate_paths: Dict[str, List[str]] = {}
+    moved_ids = set()
+    previous_path = {r["id"]: r["relative_path"] for r in previous
+                     if "id" in r and "error" not in r and "duplicate_of" not in r}
+    for group in groups.values():
+        head = group[0]["relative_path"]
+        for entry in group:
+            canonical_of[entry["relative_path"]] = head
+        if len(group) > 1:
+            duplicate_paths[head] = [entry["relative_path"] for entry in group[1:]]
+        if previous_path.get(group[0]["id"], head) != head:
+            moved_ids.add(group[0]["id"])
+
+    # Reused records take the role their path has now
+    records, regraph, reused = [], [], {}
+    for record in unchanged:
+        path = record["relative_path"]
+        head = canonical_of.get(path, path)
+        fixed = {k: v for k, v in record.items() if k not in ("duplicate_of", "duplicate_paths")}
+        if head != path:
+            fixed["duplicate_of"] = head
+        else:
+            if path in duplicate_paths:
+                fixed["duplicate_paths"] = duplicate_paths[path]
+            if ("duplicate_of" in record or record.get("duplicate_paths") != fixed.get("duplicate_paths")
+                    or record.get("id") in moved_ids):
+                regraph.append(fixed)
+            reused[path] = fixed
+        records.append(fixed)
+
+    pending = {entry["relative_path"] for entry in to_process}
+    unique, copies = [], {}
+    for entry in to_process:
+        head = canonical_of.get(entry["relative_path"], entry["relative_path"])
+        if head in reused:
+            records.append(copy_record(reused[head], entry))
+        elif head != entry["relative_path"] and head in pending:
+            copies.setdefault(head, []).append(entry)
+        else:
+            unique.append(entry)
+    return {"to_process": unique, "copies": copies, "duplicate_paths": duplicate_paths,
+            "unchanged": records, "regraph": regraph, "moved_ids": sorted(moved_ids)}
+
+def copy_record(record: dict, entry: dict) -> dict:
+    """Metadata record for a byte-identical copy, reusing the canonical record's extraction."""
+    if "error" in record:
+        return {"error": record["error"], "filename": entry["filename"]}
+    tags = {"domain": entry["domain"], "region": entry["region"], "client": entry["client"]}
+    copy = dict(record, filename=entry["filename"], relative_path=entry["relative_path"], tags=tags,
+                duplicate_of=record["relative_path"])
+    copy.pop("duplicate_paths", None)
+    return copy
+
+# -----------------------------
+# Near duplicates (after extraction)
+# -----------------------------
+def near_duplicate_links(docs: List[dict], signatures: np.ndarray,
+                         modified: Optional[Dict[str, str]] = None) -> List[dict]:
+    """DUPLICATE_OF / VERSION_OF links between documents with similar text.
+
+    Candidates come from LSH banding of the MinHash signatures and are kept if
+    their estimated Jaccard similarity reaches VERSION_THRESHOLD. Links point
+    from the more recently modified document to the older one.
+    """
+    modified = modified or {}
+    links = []
+    for i, j in sorted(lsh_candidate_pairs(signatures)):
+        a, b = docs[i], docs[j]
+        if a["id"] == b["id"]:
+            continue
+        similarity = float(jaccard(signatures[i], signatures[j]))
+        if similarity < VERSION_THRESHOLD:
+            continue
+        older, newer = sorted((a, b), key=lambda d: (modified.get(d["id"]) or "", d["relative_path"]))
+        links.append({
+            "from": newer["id"],
+            "to": older["id"],
+            "type": "DUPLICATE_OF" if similarity >= DUPLICATE_THRESHOLD else "VERSION_OF",
+            "similarity": round(similarity, 4)
+        })
+    return links
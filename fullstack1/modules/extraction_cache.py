@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Optional
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def config_version(*parts: Any) -> str:
+    """Stable short fingerprint of an extractor configuration."""
+    blob = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+class ExtractionCache:
+    """On-disk cache of extraction output keyed by (kind, file hash, version).
+
+    `kind` namespaces independent stages (e.g. raw text vs. enrichment) so a
+    change to one stage's config only invalidates that stage. Payloads are
+    zlib-compressed JSON. Total payload size is capped at max_bytes and the
+    least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (kind, file_hash)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.commit()
+
+    def get(self, kind: str, file_hash: str, version: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, payload FROM entries WHERE kind = ? AND file_hash = ?",
+                (kind, file_hash)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] != version:
+                # Produced by an older extractor config: drop it
+                self._conn.execute("DELETE FROM entries WHERE kind = ? AND file_hash = ?", (kind, file_hash))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE kind = ? AND file_hash = ?",
+                (time.time(), kind, file_hash)
+            )
+            self._conn.commit()
+        return json.loads(zlib.decompress(row[1]).decode("utf-8"))
+
+    def put(self, kind: str, file_hash: str, version: str, value: Any):
+        payload = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, file_hash, version, payload, len(payload), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, kind: str, version: str):
+        """Drop every entry of `kind` not produced by `version`."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE kind = ? AND version != ?", (kind, version))
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT kind, file_hash, size FROM entries ORDER BY last_access").fetchall()
+        for kind, file_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE kind = ? AND file_hash = ?", (kind, file_hash))
+            total -= size
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,57 @@
+import os
+import json
+from typing import Dict, List, Optional
+
+# -----------------------------
+# Previous-run state
+# -----------------------------
+def load_previous(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return []
+
+def index_by_path(entries: List[dict]) -> Dict[str, dict]:
+    return {e["relative_path"]: e for e in entries if "relative_path" in e}
+
+def reusable_entry(previous: Optional[dict], size: int, last_modified: str) -> bool:
+    """Cheap check: same size and mtime means the stored hash can be trusted."""
+    return (
+        previous is not None
+        and "hash" in previous
+        and previous.get("file_size_bytes") == size
+        and previous.get("last_modified") == last_modified
+    )
+
+# -----------------------------
+# Change planning
+# -----------------------------
+def plan_incremental(sitemap: List[dict], previous_metadata: List[dict]) -> dict:
+    """Split the current sitemap into work to do and records to keep.
+
+    Returns a dict with:
+      to_process  - sitemap entries that are new or whose content hash changed
+      unchanged   - previous metadata records that can be reused as-is
+      deleted_ids - document ids no longer backed by any file in the sitemap
+    """
+    previous = index_by_path([r for r in previous_metadata if "error" not in r])
+
+    to_process, unchanged = [], []
+    for entry in sitemap:
+        record = previous.get(entry["relative_path"])
+        if record is not None and record.get("hash") == entry.get("hash"):
+            unchanged.append(record)
+        else:
+            to_process.append(entry)
+
+    current_ids = {entry["id"] for entry in sitemap}
+    deleted_ids = sorted({r["id"] for r in previous.values() if r.get("id") not in current_ids})
+
+    return {
+        "to_process": to_process,
+        "unchanged": unchanged,
+        "deleted_ids": deleted_ids
+    }
@@ -0,0 +1,148 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+class JobCancelled(Exception):
+    pass
+
+class JobAlreadyRunning(Exception):
+    def __init__(self, job_id: str):
+        super().__init__(f"Job {job_id} is already running")
+        self.job_id = job_id
+
+class IngestJob:
+    """Progress and cancellation state shared between a job and the routes polling it."""
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params or {}
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    # -----------------------------
+    # Progress reporting (job side)
+    # -----------------------------
+    def start_stage(self, name: str, total: int):
+        with self._lock:
+            self.stages[name] = {"total": total, "done": 0, "started_at": time.time(), "finished_at": None}
+
+    def advance(self, name: str, n: int = 1):
+        with self._lock:
+            stage = self.stages.setdefault(
+                name, {"total": 0, "done": 0, "started_at": time.time(), "finished_at": None}
+            )
+            stage["done"] += n
+            if stage["total"] and stage["done"] >= stage["total"]:
+                stage["finished_at"] = time.time()
+
+    def finish_stage(self, name: str):
+        with self._lock:
+            if name in self.stages:
+                self.stages[name]["finished_at"] = time.time()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    # -----------------------------
+    # Status (route side)
+    # -----------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            stages = {}
+            for name, stage in self.stages.items():
+                end = stage["finished_at"] or now
+                elapsed = max(end - stage["started_at"], 1e-6)
+                throughput = stage["done"] / elapsed
+                remaining = max(stage["total"] - stage["done"], 0)
+                stages[name] = {
+                    "total": stage["total"],
+                    "done": stage["done"],
+                    "throughput_per_sec": round(throughput, 3),
+                    "eta_sec": round(remaining / throughput, 1) if throughput > 0 and remaining else 0
+                }
+            return {
+                "id": self.id,
+                "status": self.status,
+                "params": self.params,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "elapsed_sec": round((self.finished_at or now) - self.started_at, 3) if self.started_at else 0,
+                "stages": stages,
+                "result": self.result
+            }
+
+class JobManager:
+    """Runs ingest jobs on a single background thread, one at a time."""
+
+    def __init__(self, history: int = 20):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, IngestJob] = {}
+        self._order: List[str] = []
+        self._active: Optional[IngestJob] = None
+        self.history = history
+
+    def submit(self, fn: Callable[[IngestJob], Dict[str, Any]], params: Optional[Dict[str, Any]] = None) -> IngestJob:
+        with self._lock:
+            if self._active is not None:
+                raise JobAlreadyRunning(self._active.id)
+            job = IngestJob(params)
+            self._jobs[job.id] = job
+            self._order.append(job.id)
+            self._active = job
+            # Forget the oldest finished jobs
+            while len(self._order) > self.history:
+                del self._jobs[self._order.pop(0)]
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        with self._lock:
+            return [self._jobs[job_id] for job_id in reversed(self._order)]
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        job = self.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job.cancel()
+        return job
+
+    def _run(self, job: IngestJob, fn: Callable[[IngestJob], Dict[str, Any]]):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.check_cancelled()
+            job.result = fn(job)
+            job.status = "completed"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active = None
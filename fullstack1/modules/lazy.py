@@ -0,0 +1,67 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# name -> seconds spent building it, for every LazyResource loaded in this process
+LOAD_TIMINGS: Dict[str, float] = {}
+
+class LazyResource(Generic[T]):
+    """Builds an expensive object on first use, exactly once, from any thread.
+
+    Importing a module that declares a LazyResource costs nothing; the factory
+    runs on the first get() (or warm_up()). Concurrent first callers block on
+    the same lock and all receive the single instance.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self.factory()
+                LOAD_TIMINGS[self.name] = round(time.perf_counter() - start, 3)
+                self._loaded = True
+        return self._value
+
+    def reset(self, factory: Optional[Callable[[], T]] = None) -> Optional[T]:
+        """Forget the current instance (optionally swapping the factory); returns it for cleanup."""
+        with self._lock:
+            old = self._value if self._loaded else None
+            if factory is not None:
+                self.factory = factory
+            self._value, self._loaded = None, False
+            LOAD_TIMINGS.pop(self.name, None)
+        return old
+
+def warm_up(resources: List[LazyResource], background: bool = False) -> Optional[threading.Thread]:
+    """Load resources ahead of the first request; in a daemon thread if background."""
+    def load():
+        for resource in resources:
+            try:
+                resource.get()
+            except Exception as e:
+                print(f"Warm-up of {resource.name} failed: {e}")
+
+    if not background:
+        load()
+        return None
+    thread = threading.Thread(target=load, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def load_timings() -> Dict[str, Any]:
+    return dict(LOAD_TIMINGS)
@@ -1,10 +1,23 @@
 import re
 import asyncio
-from typing import List, Dict
-import spacy
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, List, Dict, Optional
 
-# Load spaCy model once at module level
-nlp = spacy.load("en_core_web_sm")
+from .lazy import LazyResource
+
+MODEL_NAME = "en_core_web_sm"
+
+# Pipeline profiles: which extractors run and which model they run on. Only the
+# spaCy components those extractors need are loaded; the rest are excluded.
+PIPELINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "full": {"model": MODEL_NAME, "extractors": ["domains", "organizations", "technologies"]},
+    "tags": {"model": MODEL_NAME, "extractors": ["domains", "technologies"]},
+    "entities": {"model": MODEL_NAME, "extractors": ["organizations"]},
+    "accurate": {"model": "en_core_web_md", "extractors": ["domains", "organizations", "technologies"]},
+}
+DEFAULT_PROFILE = "full"
 
 INDUSTRY_KEYWORDS = {
     "Finance": ["investment", "banking", "portfolio", "equity", "trading", "fintech"],
@@ -16,64 +29,329 @@ INDUSTRY_KEYWORDS = {
     "Legal": ["compliance", "contract", "litigation", "regulation", "law", "jurisdiction"]
 }
 
+TECHNOLOGY_TERMS = ["azure", "terraform", "kubernetes"]
+
+# Bump when the shape of enrich_text output changes (invalidates cached results)
+ENRICHMENT_SCHEMA = 3
+
+# Defaults for corpus-level enrichment through nlp.pipe
+NLP_BATCH_SIZE = 8
+NLP_N_PROCESS = 1
+
+# Texts are parsed in chunks of at most this many characters (and never more
+# than nlp.max_length), split on page/paragraph/line/sentence boundaries
+CHUNK_CHARS = 100_000
+
+# -----------------------------
+# Doc extractor registry
+# -----------------------------
+# Every registered extractor reads from the same parsed spaCy Doc, so adding
+# a new one never costs another nlp(text) call. Extractors return one string
+# per occurrence; occurrences from several Docs (chunks, pages) are merged into
+# frequency counts.
+# `requires` lists the pipeline components the extractor reads from.
+DOC_EXTRACTORS: Dict[str, Callable[[Any], Any]] = {}
+EXTRACTOR_COMPONENTS: Dict[str, List[str]] = {}
+
+def register_extractor(name: str, requires: List[str] = ()):
+    def decorator(fn: Callable[[Any], Any]):
+        DOC_EXTRACTORS[name] = fn
+        EXTRACTOR_COMPONENTS[name] = list(requires)
+        return fn
+    return decorator
+
+@register_extractor("domains", requires=["tok2vec", "tagger", "attribute_ruler", "parser"])
+def domains_from_doc(doc) -> List[str]:
+    return [chunk.text for chunk in doc.noun_chunks if len(chunk.text.split()) <= 3]
+
+@register_extractor("organizations", requires=["ner"])
+def organizations_from_doc(doc) -> List[str]:
+    return [ent.text for ent in doc.ents if ent.label_ in ["ORG", "PRODUCT"]]
+
+@register_extractor("technologies", requires=["tok2vec", "tagger", "attribute_ruler"])
+def technologies_from_doc(doc) -> List[str]:
+    return [
+        token.text for token in doc
+        if token.pos_ == "PROPN" and token.text.lower() in TECHNOLOGY_TERMS
+    ]
+
+# -----------------------------
+# Pipeline profiles
+# -----------------------------
+# The process-wide profile (use_profile) and a per-run override (run_profile).
+# The override lives in a context variable, so it follows an ingest into the
+# threads it starts (asyncio.to_thread copies the context) without changing
+# what concurrent requests on other threads see.
+default_profile = DEFAULT_PROFILE
+_run_profile: ContextVar[Optional[str]] = ContextVar("nlp_profile", default=None)
+
+def load_pipeline(model: str, extractors: List[str]):
+    """Load `model` keeping only the components the given extractors need.
+
+    The others are excluded up front, so their weights are never read.
+    """
+    import spacy  # deferred: importing spaCy alone takes seconds
+    config = model_config(model)
+    keep = set(profile_components(extractors))
+    # A shared embedding layer stays while any kept component listens to it
+    upstream = {name for component in keep for name in listened_to(config["components"].get(component, {}))}
+    exclude = [
+        name for name in config["nlp"]["pipeline"]
+        if name not in keep and name not in upstream
+        and not ("*" in upstream and config["components"][name].get("factory") == "tok2vec")
+    ]
+    return spacy.load(model, exclude=exclude)
+
+def model_config(model: str):
+    """The config of an installed model package or model directory, read without loading the model."""
+    from pathlib import Path
+    import spacy
+    if not spacy.util.is_package(model):
+        return spacy.util.load_config(Path(model) / "config.cfg")
+    path = spacy.util.get_package_path(model)
+    meta = spacy.util.get_model_meta(path)
+    return spacy.util.load_config(path / f"{meta['lang']}_{meta['name']}-{meta['version']}" / "config.cfg")
+
+def listened_to(block) -> List[str]:
+    """Names of the tok2vec components a component's model listens to ("*" = any)."""
+    if not isinstance(block, dict):
+        return []
+    names = [block["upstream"]] if "Tok2VecListener" in str(block.get("@architectures", "")) else []
+    for value in block.values():
+        names.extend(listened_to(value))
+    return names
+
+def profile_components(extractors: List[str]) -> List[str]:
+    return sorted({component for name in extractors for component in EXTRACTOR_COMPONENTS[name]})
+
+# One pipeline per profile, each built on first use, not at import
+PIPELINES: Dict[str, LazyResource] = {
+    name: LazyResource(f"nlp:{name}", lambda config=config: load_pipeline(config["model"], config["extractors"]))
+    for name, config in PIPELINE_PROFILES.items()
+}
+
+def check_profile(profile: str):
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Unknown NLP profile {profile!r}; choose from {sorted(PIPELINE_PROFILES)}")
+
+def current_profile() -> str:
+    return _run_profile.get() or default_profile
+
+def pipeline(profile: Optional[str] = None) -> LazyResource:
+    return PIPELINES[profile or current_profile()]
+
+def get_nlp():
+    return pipeline().get()
+
+def use_profile(profile: str = DEFAULT_PROFILE):
+    """Select the process-wide profile; its pipeline is loaded lazily by get_nlp()."""
+    global default_profile
+    check_profile(profile)
+    default_profile = profile
+
+@contextmanager
+def run_profile(profile: str):
+    """Use `profile` in this context (and threads started from it) until the block exits."""
+    check_profile(profile)
+    token = _run_profile.set(profile)
+    try:
+        yield
+    finally:
+        _run_profile.reset(token)
+
+def extractor_config(profile: Optional[str] = None) -> Dict[str, Any]:
+    """Everything that changes enrichment output; used to version cached results."""
+    config = PIPELINE_PROFILES[profile or current_profile()]
+    return {
+        "schema": ENRICHMENT_SCHEMA,
+        "model": config["model"],
+        "components": profile_components(config["extractors"]),
+        "industries": INDUSTRY_KEYWORDS,
+        "technologies": TECHNOLOGY_TERMS,
+        "extractors": sorted(config["extractors"])
+    }
+
+def run_doc_extractors(doc) -> Dict[str, Any]:
+    return {name: DOC_EXTRACTORS[name](doc) for name in PIPELINE_PROFILES[current_profile()]["extractors"]}
+
+def count_extracted(counts: Dict[str, Counter], extracted: Dict[str, List[str]]) -> Dict[str, Counter]:
+    """Merge one Doc's extractor output into running frequency counts."""
+    for name, values in extracted.items():
+        counts.setdefault(name, Counter()).update(values)
+    return counts
+
+def ranked(counts: Dict[str, Counter], name: str) -> List[str]:
+    """Distinct values, most frequent first."""
+    return [value for value, _ in counts.get(name, Counter()).most_common()]
+
+def build_entities(counts: Dict[str, Counter]) -> Dict[str, List[str]]:
+    organizations = ranked(counts, "organizations")
+    return {
+        "clients": list(organizations),
+        "products": list(organizations),
+        "technologies": ranked(counts, "technologies"),
+        "partners": list(organizations)
+    }
+
+# -----------------------------
+# Chunking
+# -----------------------------
+CHUNK_SEPARATORS = ("\f", "\n\n", "\n", ". ", " ")
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS, separators=CHUNK_SEPARATORS) -> List[str]:
+    """Split text into chunks of at most max_chars on the coarsest boundary available.
+
+    The chunks concatenate back to the original text, so offsets are preserved.
+    """
+    max_chars = max(1, min(max_chars, get_nlp().max_length - 1))
+    if len(text) <= max_chars:
+        return [text] if text else []
+    for i, sep in enumerate(separators):
+        if sep in text:
+            parts = [part + sep for part in text.split(sep)]
+            parts[-1] = parts[-1][:-len(sep)]
+            finer = separators[i + 1:]
+            break
+    else:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    chunks, current = [], ""
+    for part in parts:
+        if len(part) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(chunk_text(part, max_chars, finer))
+        elif len(current) + len(part) > max_chars:
+            chunks.append(current)
+            current = part
+        else:
+            current += part
+    if current:
+        chunks.append(current)
+    return chunks
+
+def extract_counts(text: str, batch_size: int = NLP_BATCH_SIZE) -> Dict[str, Counter]:
+    """Run every registered extractor over the text, chunk by chunk."""
+    counts: Dict[str, Counter] = {}
+    for doc in get_nlp().pipe(chunk_text(text), batch_size=batch_size):
+        count_extracted(counts, run_doc_extractors(doc))
+    return counts
+
+# -----------------------------
+# Keyword matching
+# -----------------------------
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    # "" marks the end of a term; an optional group lets longer terms win first
+    if "" in node and len(node) == 1:
+        return ""
+    alternatives = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch != ""]
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return "(?:" + body + ")?" if "" in node else body
+
+WORD_CHAR_RE = re.compile(r"\w")
+
+def _is_boundary(text: str, pos: int) -> bool:
+    """Same test as regex \\b at pos."""
+    before = pos > 0 and WORD_CHAR_RE.match(text[pos - 1]) is not None
+    after = pos < len(text) and WORD_CHAR_RE.match(text[pos]) is not None
+    return before != after
+
+class KeywordMatcher:
+    """Finds every term of a {label: [terms]} taxonomy in a single regex pass.
+
+    The terms are compiled once into a trie-shaped regex, so matching cost
+    depends on the text length rather than on the number of terms. Matches may
+    overlap, as if each term were searched on its own: "machine learning"
+    also counts "learning".
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.labels: Dict[str, List[str]] = {}
+        trie: Dict[str, Any] = {}
+        for label, terms in taxonomy.items():
+            for term in terms:
+                term = term.lower()
+                self.labels.setdefault(term, []).append(label)
+                node = trie
+                for ch in term:
+                    node = node.setdefault(ch, {})
+                node[""] = {}
+        self.trie = trie
+        # Zero-width lookahead: finditer stops at every position where some
+        # term starts, even inside a longer match
+        self.pattern = re.compile(rf"(?=\b{_trie_pattern(trie)}\b)", re.IGNORECASE) if trie else None
+
+    def match(self, text: str) -> Dict[str, Dict[str, Any]]:
+        """Returns {label: {"count": n, "offsets": [start, ...]}} for every label found."""
+        hits: Dict[str, Dict[str, Any]] = {}
+        if self.pattern is None:
+            return hits
+        for m in self.pattern.finditer(text):
+            for term in self._terms_at(text, m.start()):
+                for label in self.labels[term]:
+                    hit = hits.setdefault(label, {"count": 0, "offsets": []})
+                    hit["count"] += 1
+                    hit["offsets"].append(m.start())
+        return hits
+
+    def _terms_at(self, text: str, start: int) -> List[str]:
+        """Every term starting at `start` and ending on a word boundary (shorter first)."""
+        terms = []
+        node = self.trie
+        pos = start
+        while True:
+            if "" in node and pos > start and _is_boundary(text, pos):
+                terms.append(text[start:pos].lower())
+            if pos == len(text):
+                break
+            node = node.get(text[pos].lower())
+            if node is None:
+                break
+            pos += 1
+        return terms
+
+# Compiled once; rebuild it if INDUSTRY_KEYWORDS is changed at runtime
+INDUSTRY_MATCHER = KeywordMatcher(INDUSTRY_KEYWORDS)
+
+def match_industry_keywords(text: str) -> Dict[str, Dict[str, Any]]:
+    return INDUSTRY_MATCHER.match(text)
+
+def find_industries(text: str) -> List[str]:
+    return list(match_industry_keywords(text))
+
 # -----------------------------
 # Async wrappers
 # -----------------------------
 async def extract_industry_keywords(text: str) -> List[str]:
-    def _extract():
-        text_lower = text.lower()
-        found_keywords = set()
-        for industry, keywords in INDUSTRY_KEYWORDS.items():
-            for keyword in keywords:
-                if re.search(rf"\b{re.escape(keyword.lower())}\b", text_lower):
-                    found_keywords.add(industry)
-                    break
-        return list(found_keywords)
-    return await asyncio.to_thread(_extract)
+    return await asyncio.to_thread(find_industries, text)
 
 async def extract_entities(text: str) -> Dict[str, List[str]]:
     def _extract():
-        doc = nlp(text)
-        entities = {
-            "clients": [],
-            "products": [],
-            "technologies": [],
-            "partners": []
-        }
-        for ent in doc.ents:
-            if ent.label_ in ["ORG", "PRODUCT"]:
-                entities["clients"].append(ent.text)
-                entities["partners"].append(ent.text)
-                entities["products"].append(ent.text)
-        for token in doc:
-            if token.pos_ == "PROPN" and token.text.lower() in ["azure", "terraform", "kubernetes"]:
-                entities["technologies"].append(token.text)
-        # Deduplicate
-        for key in entities:
-            entities[key] = list(set(entities[key]))
-        return entities
+        return build_entities(extract_counts(text))
     return await asyncio.to_thread(_extract)
 
 async def extract_domain_tags(text: str) -> List[str]:
     def _extract():
-        doc = nlp(text)
-        return list(set([chunk.text for chunk in doc.noun_chunks if len(chunk.text.split()) <= 3]))
+        return ranked(extract_counts(text), "domains")
     return await asyncio.to_thread(_extract)
 
+async def extract_with_shared_doc(text: str) -> Dict[str, Counter]:
+    """Parse the text once (in chunks) and run every registered extractor on it."""
+    return await asyncio.to_thread(extract_counts, text)
+
 # -----------------------------
 # Main async enrichment
 # -----------------------------
-async def enrich_text(text: str, page_count: int) -> Dict:
-    industries, domains, entities = await asyncio.gather(
-        extract_industry_keywords(text),
-        extract_domain_tags(text),
-        extract_entities(text)
-    )
-    word_count = len(text.split())
+def build_enrichment(text: str, page_count: int, industry_hits: Dict[str, Dict[str, Any]],
+                     counts: Dict[str, Counter]) -> Dict:
+    return enrichment_result(text[:300], len(text.split()), page_count, industry_hits, counts)
 
+def enrichment_result(head: str, word_count: int, page_count: int,
+                      industry_hits: Dict[str, Dict[str, Any]], counts: Dict[str, Counter]) -> Dict:
     return {
         "content_summary": {
-            "summary": text[:300].replace("\n", " ") + "...",  # placeholder
+            "summary": head[:300].replace("\n", " ") + "...",  # placeholder
             "word_count": word_count,
             "page_count": page_count
         },
@@ -82,8 +360,108 @@ async def enrich_text(text: str, page_count: int) -> Dict:
             "sub_type": "Technical Proposal"  # placeholder
         },
         "industry_tags": {
-            "industries": industries,
-            "domains": domains[:10]  # limit to top 10
+            "industries": list(industry_hits),
+            "industry_hits": {industry: hit["count"] for industry, hit in industry_hits.items()},
+            "domains": ranked(counts, "domains")[:10]  # top 10 by frequency
         },
-        "entities": entities
-    }
\ No newline at end of file
+        "entities": build_entities(counts),
+        "entity_counts": {
+            "organizations": dict(counts.get("organizations", Counter()).most_common()),
+            "technologies": dict(counts.get("technologies", Counter()).most_common())
+        }
+    }
+
+def enrich_text_sync(text: str, page_count: int) -> Dict:
+    return build_enrichment(text, page_count, match_industry_keywords(text), extract_counts(text))
+
+async def enrich_text(text: str, page_count: int) -> Dict:
+    industry_hits, counts = await asyncio.gather(
+        asyncio.to_thread(match_industry_keywords, text),
+        extract_with_shared_doc(text)
+    )
+    return build_enrichment(text, page_count, industry_hits, counts)
+
+# -----------------------------
+# Page-streaming enrichment
+# -----------------------------
+STREAM_WINDOW_CHARS = CHUNK_CHARS
+
+class StreamingEnricher:
+    """Builds enrich_text output from page texts fed one at a time.
+
+    Only the current window (about window_chars of text) and the aggregates are
+    kept, so memory stays bounded however many pages the document has. Pages
+    are treated as joined by newlines, matching extract_pdf_text.
+    """
+
+    def __init__(self, window_chars: int = STREAM_WINDOW_CHARS, head_chars: int = 300):
+        self.window_chars = window_chars
+        self.head_chars = head_chars
+        self.head = ""  # first head_chars of the document
+        self.char_count = 0
+        self.word_count = 0
+        self.pages = 0
+        self.industry_hits: Dict[str, Dict[str, Any]] = {}
+        self.counts: Dict[str, Counter] = {}
+        self._window: List[str] = []
+        self._window_chars = 0
+
+    def feed(self, page_text: str):
+        # Every page but the first follows a "\n", even after empty pages
+        separator = "\n" if self.pages else ""
+        offset = self.char_count + len(separator)
+        if len(self.head) < self.head_chars:
+            self.head = (self.head + separator + page_text)[:self.head_chars]
+        self.char_count = offset + len(page_text)
+        self.pages += 1
+        self.word_count += len(page_text.split())
+
+        for industry, hit in match_industry_keywords(page_text).items():
+            total = self.industry_hits.setdefault(industry, {"count": 0, "offsets": []})
+            total["count"] += hit["count"]
+            total["offsets"].extend(offset + o for o in hit["offsets"])
+
+        self._window.append(page_text)
+        self._window_chars += len(page_text)
+        if self._window_chars >= self.window_chars:
+            self._flush()
+
+    def _flush(self):
+        if not self._window:
+            return
+        window = "\n".join(self._window)
+        self._window, self._window_chars = [], 0
+        for doc in get_nlp().pipe(chunk_text(window, self.window_chars)):
+            count_extracted(self.counts, run_doc_extractors(doc))
+
+    def result(self, page_count: int) -> Dict:
+        self._flush()
+        return enrichment_result(self.head, self.word_count, page_count, self.industry_hits, self.counts)
+
+# -----------------------------
+# Corpus-level batch enrichment
+# -----------------------------
+def enrich_texts(texts: List[str], page_counts: List[int],
+                 batch_size: int = NLP_BATCH_SIZE, n_process: int = NLP_N_PROCESS) -> List[Dict]:
+    """Enrich many documents with one nlp.pipe pass; results keep the input order.
+
+    Each text is split with chunk_text and all chunks of the corpus go through a
+    single pipe; per-chunk results are merged back into their document.
+    """
+    owners: List[int] = []
+
+    def chunks():
+        for i, text in enumerate(texts):
+            for chunk in chunk_text(text):
+                owners.append(i)
+                yield chunk
+
+    counts: List[Dict[str, Counter]] = [{} for _ in texts]
+    docs = get_nlp().pipe(chunks(), batch_size=batch_size, n_process=n_process)
+    for n, doc in enumerate(docs):
+        count_extracted(counts[owners[n]], run_doc_extractors(doc))
+
+    return [
+        build_enrichment(text, page_count, match_industry_keywords(text), doc_counts)
+        for text, page_count, doc_counts in zip(texts, page_counts, counts)
+    ]
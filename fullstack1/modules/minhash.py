@@ -0,0 +1,82 @@
+import zlib
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from modules.passage_index import tokenize
+
+# Bump when shingling or the hash family changes; stored signatures become incomparable
+MINHASH_VERSION = "words-5-perm-128-1"
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 128
+
+# Universal hashing (a * x + b) mod p over a Mersenne prime, so every product
+# fits in uint64 and signatures fit in uint32
+MERSENNE_PRIME = (1 << 31) - 1
+EMPTY_VALUE = np.uint32(MERSENNE_PRIME)  # signature of a text with no shingles
+
+# Shingle hashes permuted per block, bounding the (block x permutations) temporary
+HASH_BLOCK = 8192
+
+_rng = np.random.default_rng(1)
+PERM_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+PERM_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+
+# -----------------------------
+# Shingles
+# -----------------------------
+def shingle_hashes(texts: Iterable[str], words: int = SHINGLE_WORDS) -> np.ndarray:
+    """Distinct crc32 hashes of the word n-grams of each text (shingles never span texts)."""
+    hashes = set()
+    for text in texts:
+        tokens = tokenize(text)
+        if 0 < len(tokens) < words:
+            hashes.add(zlib.crc32(" ".join(tokens).encode("utf-8")))
+        for i in range(len(tokens) - words + 1):
+            hashes.add(zlib.crc32(" ".join(tokens[i:i + words]).encode("utf-8")))
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+# -----------------------------
+# Signatures
+# -----------------------------
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """MinHash signature (NUM_PERMUTATIONS uint32 values) of a set of shingle hashes."""
+    signature = np.full(NUM_PERMUTATIONS, EMPTY_VALUE, dtype=np.uint32)
+    hashes = np.asarray(hashes, dtype=np.uint64) % np.uint64(MERSENNE_PRIME)
+    for start in range(0, len(hashes), HASH_BLOCK):
+        block = hashes[start:start + HASH_BLOCK, None]
+        permuted = (block * PERM_A + PERM_B) % np.uint64(MERSENNE_PRIME)
+        np.minimum(signature, permuted.min(axis=0).astype(np.uint32), out=signature)
+    return signature
+
+def text_signature(texts: Iterable[str]) -> np.ndarray:
+    return minhash(shingle_hashes(texts))
+
+def is_empty(signature: np.ndarray) -> bool:
+    return bool((signature == EMPTY_VALUE).all())
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of shingle sets; b may be a (n, NUM_PERMUTATIONS) matrix."""
+    return (np.asarray(b) == np.asarray(a)).mean(axis=-1)
+
+# -----------------------------
+# LSH banding
+# -----------------------------
+# 32 bands of 4 rows: a pair becomes a candidate with probability
+# 1 - (1 - s^4)^32, i.e. ~50% at Jaccard 0.42 and >99% from 0.65 up
+LSH_BANDS = 32
+
+def lsh_candidate_pairs(signatures: np.ndarray, bands: int = LSH_BANDS) -> Set[Tuple[int, int]]:
+    """Row pairs (i < j) sharing at least one band of their signatures; empty signatures are skipped."""
+    signatures = np.asarray(signatures, dtype=np.uint32)
+    rows = signatures.shape[1] // bands
+    live = [i for i in range(len(signatures)) if not is_empty(signatures[i])]
+    pairs: Set[Tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i in live:
+            buckets.setdefault(signatures[i, band * rows:(band + 1) * rows].tobytes(), []).append(i)
+        for members in buckets.values():
+            pairs.update(combinations(members, 2))
+    return pairs
@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import time
+import shutil
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Bump when passage splitting or tokenization changes; invalidates cached passages
+PASSAGE_VERSION = "words-120-100-1"
+PASSAGE_WORDS = 120
+PASSAGE_STRIDE = 100  # consecutive passages overlap by PASSAGE_WORDS - PASSAGE_STRIDE words
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"\w+")
+WORD_RE = re.compile(r"\S+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have in into is it its of on or
+that the their this to was were which will with
+""".split())
+
+# -----------------------------
+# Passages
+# -----------------------------
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def split_passages(pages: Iterable[str], words: int = PASSAGE_WORDS, stride: int = PASSAGE_STRIDE) -> List[dict]:
+    """Overlapping word windows over each page.
+
+    page is 1-based; start/end are character offsets within the page text and
+    doc_start is the offset of the passage in the pages joined with "\\n"
+    (i.e. in extract_pdf_text()).
+    """
+    passages = []
+    page_offset = 0
+    for page, text in enumerate(pages, start=1):
+        spans = [m.span() for m in WORD_RE.finditer(text)]
+        for first in range(0, len(spans), stride):
+            window = spans[first:first + words]
+            start, end = window[0][0], window[-1][1]
+            passages.append({
+                "page": page,
+                "start": start,
+                "end": end,
+                "doc_start": page_offset + start,
+                "text": text[start:end]
+            })
+            if first + words >= len(spans):
+                break
+        page_offset += len(text) + 1
+    return passages
+
+# -----------------------------
+# Index build
+# -----------------------------
+class PassageIndexBuilder:
+    """Accumulates passages and writes an inverted index that PassageIndex memory-maps.
+
+    Layout of one index directory:
+      meta.json       docs, passage count, average length, BM25 parameters
+      vocab.json      term -> term id
+      term_ptr.npy    postings of term t are [term_ptr[t], term_ptr[t + 1])
+      post_pid.npy    passage id per posting (grouped by term)
+      post_tf.npy     term frequency per posting
+      idf.npy         BM25 idf per term
+      passages.npy    per passage: doc index, page, start, end, doc_start
+      p_len.npy       tokens per passage
+      text.bin        UTF-8 passage texts back to back; text_ptr.npy holds byte offsets
+    The index root holds several such directories; CURRENT names the live one
+    and is swapped atomically once a build is complete. Postings and rows are
+    collected in typed arrays (4 or 8 bytes per value, not a Python int each).
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.build_dir = os.path.join(index_dir, f"build-{time.time_ns()}")
+        os.makedirs(self.build_dir, exist_ok=True)
+        self.docs: List[Dict[str, Any]] = []
+        self.vocab: Dict[str, int] = {}
+        self._terms = array("I")
+        self._pids = array("I")
+        self._tfs = array("I")
+        self._rows = array("q")  # 5 values per passage
+        self._lengths = array("I")
+        self._text_ptr = array("q", [0])
+        self._text = open(os.path.join(self.build_dir, "text.bin"), "wb")
+
+    def add_document(self, doc: Dict[str, Any], passages: List[dict]):
+        doc_index = len(self.docs)
+        self.docs.append(doc)
+        for passage in passages:
+            pid = len(self._lengths)
+            counts = Counter(tokenize(passage["text"]))
+            for term, tf in counts.items():
+                self._terms.append(self.vocab.setdefault(term, len(self.vocab)))
+                self._pids.append(pid)
+                self._tfs.append(tf)
+            self._rows.extend((doc_index, passage["page"], passage["start"], passage["end"], passage["doc_start"]))
+            self._lengths.append(sum(counts.values()))
+            data = passage["text"].encode("utf-8")
+            self._text.write(data)
+            self._text_ptr.append(self._text_ptr[-1] + len(data))
+
+    def save(self) -> str:
+        """Write the arrays, make this build CURRENT and drop older builds."""
+        self._text.close()
+        n_terms, n_passages = len(self.vocab), len(self._lengths)
+        terms = np.asarray(self._terms, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        df = np.bincount(terms, minlength=n_terms)
+        term_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(df, out=term_ptr[1:])
+        idf = np.log(1.0 + (n_passages - df + 0.5) / (df + 0.5)).astype(np.float32)
+        lengths = np.asarray(self._lengths, dtype=np.float32)
+
+        arrays = {
+            "term_ptr": term_ptr,
+            "post_pid": np.asarray(self._pids, dtype=np.int32)[order],
+            "post_tf": np.asarray(self._tfs, dtype=np.float32)[order],
+            "idf": idf,
+            "passages": np.asarray(self._rows, dtype=np.int64).reshape(n_passages, 5),
+            "p_len": lengths,
+            "text_ptr": np.asarray(self._text_ptr, dtype=np.int64),
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(self.build_dir, f"{name}.npy"), values)
+        with open(os.path.join(self.build_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        with open(os.path.join(self.build_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": PASSAGE_VERSION,
+                "built_at": time.time(),
+                "docs": self.docs,
+                "n_passages": n_passages,
+                "avg_len": float(lengths.mean()) if n_passages else 0.0,
+                "k1": BM25_K1,
+                "b": BM25_B
+            }, f, ensure_ascii=False)
+
+        name = os.path.basename(self.build_dir)
+        current = os.path.join(self.index_dir, "CURRENT")
+        with open(current + ".tmp", "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(current + ".tmp", current)
+        for entry in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, entry)
+            if entry != name and entry.startswith("build-") and os.path.isdir(path):
+                # May still be mapped by a reader (fails on Windows); retried next build
+                shutil.rmtree(path, ignore_errors=True)
+        return self.build_dir
+
+# -----------------------------
+# Index search
+# -----------------------------
+class PassageIndex:
+    """Read-only BM25 search over a built index; arrays are memory-mapped."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab: Dict[str, int] = json.load(f)
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        self.term_ptr = load("term_ptr")
+        self.post_pid = load("post_pid")
+        self.post_tf = load("post_tf")
+        self.idf = load("idf")
+        self.passages = load("passages")
+        self.text_ptr = load("text_ptr")
+        text_path = os.path.join(path, "text.bin")
+        self.text = np.memmap(text_path, dtype=np.uint8, mode="r") if os.path.getsize(text_path) else b""
+        self.docs = self.meta["docs"]
+        self.k1, self.b = self.meta["k1"], self.meta["b"]
+        # Per-passage length normalisation, computed once per load
+        avg_len = self.meta["avg_len"] or 1.0
+        self._norm = (self.k1 * (1 - self.b + self.b * load("p_len") / avg_len)).astype(np.float32)
+
+    @classmethod
+    def open(cls, index_dir: str) -> Optional["PassageIndex"]:
+        """The CURRENT build under index_dir, or None if nothing was built yet."""
+        try:
+            with open(os.path.join(index_dir, "CURRENT"), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return cls(os.path.join(index_dir, name))
+
+    def __len__(self) -> int:
+        return self.meta["n_passages"]
+
+    def search(self, query: str, k: int = 5) -> List[dict]:
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids or not len(self):
+            return []
+        scores = np.zeros(len(self), dtype=np.float32)
+        for t in term_ids:
+            lo, hi = self.term_ptr[t], self.term_ptr[t + 1]
+            pids = self.post_pid[lo:hi]
+            tf = self.post_tf[lo:hi]
+            # pids are unique within one term's postings, so fancy-index += is safe
+            scores[pids] += self.idf[t] * tf * (self.k1 + 1) / (tf + self._norm[pids])
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self.passage(int(pid), float(scores[pid])) for pid in top]
+
+    def passage(self, pid: int, score: Optional[float] = None) -> dict:
+        doc_index, page, start, end, doc_start = (int(v) for v in self.passages[pid])
+        doc = self.docs[doc_index]
+        return {
+            "doc_id": doc.get("id"),
+            "filename": doc.get("filename"),
+            "relative_path": doc.get("relative_path"),
+            "page": page,
+            "start": start,
+            "end": end,
+            "doc_start": doc_start,
+            "score": round(score, 4) if score is not None else None,
+            "text": bytes(self.text[self.text_ptr[pid]:self.text_ptr[pid + 1]]).decode("utf-8")
+        }
@@ -0,0 +1,162 @@
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime
+
+import fitz  # PyMuPDF
+
+from modules import metadata_extractors
+from modules.hashing import file_hash
+from modules.lazy import LazyResource
+
+# Bump when the text extraction itself changes; invalidates cached text
+TEXT_EXTRACTOR_VERSION = "pymupdf-text-1"
+
+# Streaming mode detects the language from the start of the document only
+LANGUAGE_SAMPLE_CHARS = 20_000
+
+# PDFs with at least this many pages are split into ranges of PAGES_PER_RANGE
+# pages that separate worker processes extract in parallel (0 disables it)
+DEFAULT_PAGE_SPLIT_THRESHOLD = 200
+PAGES_PER_RANGE = 50
+
+# -----------------------------
+# File helpers
+# -----------------------------
+def _load_langdetect():
+    # langdetect reads its ~55 language profiles on the first detect() call and
+    # that first load is not thread-safe, so do it once under the resource lock
+    from langdetect import detect, detector_factory
+    detector_factory.init_factory()
+    return detect
+
+LANGDETECT = LazyResource("langdetect", _load_langdetect)
+
+def detect_language(text: str) -> str:
+    try:
+        return LANGDETECT.get()(text)
+    except Exception:
+        return "unknown"
+
+# -----------------------------
+# PDF metadata extractor
+# -----------------------------
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """Yields page texts lazily; only one page is held at a time."""
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            yield page.get_text("text")
+
+def extract_pdf_text(file_path: str) -> str:
+    return "\n".join(iter_pdf_pages(file_path))
+
+def extract_pdf_pages(file_path: str) -> List[str]:
+    """All page texts as a list (picklable, for process pools)."""
+    return list(iter_pdf_pages(file_path))
+
+# -----------------------------
+# Page-range splitting
+# -----------------------------
+def should_split(page_count: Optional[int], threshold: int = DEFAULT_PAGE_SPLIT_THRESHOLD) -> bool:
+    return bool(threshold) and (page_count or 0) >= threshold
+
+def page_ranges(page_count: int, pages_per_range: int = PAGES_PER_RANGE) -> List[Tuple[int, int]]:
+    """Disjoint [start, stop) page ranges covering the whole document, in order."""
+    return [(start, min(start + pages_per_range, page_count)) for start in range(0, page_count, pages_per_range)]
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Page texts of pages [start, stop); runs in a worker that opens its own handle on the file.
+
+    Joining the pages of all page_ranges() with "\n" gives exactly extract_pdf_text().
+    """
+    with fitz.open(file_path) as doc:
+        return [doc[i].get_text("text") for i in range(start, min(stop, doc.page_count))]
+
+def extract_pdf_metadata(file_path: str) -> dict:
+    props = {}
+    try:
+        stat = os.stat(file_path)
+        props["file_size_bytes"] = stat.st_size
+        props["created_time"] = datetime.fromtimestamp(stat.st_ctime).isoformat()
+        props["modified_time"] = datetime.fromtimestamp(stat.st_mtime).isoformat()
+    except Exception as e:
+        props["fs_meta_error"] = str(e)
+
+    try:
+        with fitz.open(file_path) as doc:
+            props["page_count"] = doc.page_count
+            props["pdf_metadata"] = doc.metadata or {}
+    except Exception as e:
+        props["pdf_meta_error"] = str(e)
+
+    return props
+
+def extract_pdf_file(file_path: str, preview_chars: int = 1500,
+                     hash_val: Optional[str] = None, text: Optional[str] = None) -> Tuple[dict, str]:
+    """Returns (derived fields, full text) for one PDF.
+
+    Pass hash_val when the digest is already known (e.g. from the sitemap) to
+    avoid reading the file a second time, and text when it came from a cache.
+    """
+    start = time.time()
+    if text is None:
+        text = extract_pdf_text(file_path)
+    props = extract_pdf_metadata(file_path)
+    return {
+        "hash": hash_val or file_hash(file_path),
+        "props": props,
+        "language": detect_language(text),
+        "content_length": len(text),
+        "content_preview": text[:preview_chars],
+        "extraction_time_sec": round(time.time() - start, 3)
+    }, text
+
+def stream_pdf_file(file_path: str, preview_chars: int = 1500, hash_val: Optional[str] = None) -> dict:
+    """Extract and enrich one PDF page by page, never holding the full text.
+
+    Returns the same fields as extract_pdf_file plus "enrichment".
+    """
+    start = time.time()
+    props = extract_pdf_metadata(file_path)
+    enricher = metadata_extractors.StreamingEnricher(head_chars=max(preview_chars, LANGUAGE_SAMPLE_CHARS))
+    for page_text in iter_pdf_pages(file_path):
+        enricher.feed(page_text)
+    return {
+        "hash": hash_val or file_hash(file_path),
+        "props": props,
+        "language": detect_language(enricher.head[:LANGUAGE_SAMPLE_CHARS]),
+        "content_length": enricher.char_count,
+        "content_preview": enricher.head[:preview_chars],
+        "extraction_time_sec": round(time.time() - start, 3),
+        "enrichment": enricher.result(props.get("page_count") or 0)
+    }
+
+# -----------------------------
+# Process-pool workers
+# -----------------------------
+def init_worker(profile: str = metadata_extractors.DEFAULT_PROFILE):
+    """Pool initializer: load the profile's spaCy pipeline once per worker process."""
+    metadata_extractors.use_profile(profile)
+    metadata_extractors.get_nlp()
+    LANGDETECT.get()
+
+def process_pdf_file(file_path: str, preview_chars: int = 1500, hash_val: Optional[str] = None,
+                     streaming: bool = False, text: Optional[str] = None, return_pages: bool = False) -> dict:
+    """Extract and enrich one PDF inside a worker process.
+
+    Only the derived fields travel back to the parent, unless the parent passes
+    the text in (cached or stitched from page ranges) or asks for the extracted
+    page texts back with return_pages (under "pages") so it can cache them.
+    """
+    if streaming:
+        return stream_pdf_file(file_path, preview_chars, hash_val)
+    pages = None
+    if text is None and return_pages:
+        pages = list(iter_pdf_pages(file_path))
+        text = "\n".join(pages)
+    extracted, text = extract_pdf_file(file_path, preview_chars, hash_val, text=text)
+    page_count = extracted["props"].get("page_count") or 0
+    extracted["enrichment"] = metadata_extractors.enrich_text_sync(text, page_count)
+    if pages is not None:
+        extracted["pages"] = pages
+    return extracted
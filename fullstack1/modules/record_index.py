@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+Facet = Callable[[dict], Iterable[Any]]
+
+# -----------------------------
+# Field helpers
+# -----------------------------
+def field(record: dict, path: str) -> Any:
+    """Value at a dotted path ("tags.domain"), or None."""
+    value: Any = record
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def project(record: dict, fields: Optional[List[str]] = None, exclude: Iterable[str] = ()) -> dict:
+    """Keep only `fields` (dotted paths allowed); without fields, drop the `exclude` keys."""
+    if not fields:
+        return {k: v for k, v in record.items() if k not in exclude}
+    projected: Dict[str, Any] = {}
+    for path in fields:
+        value = field(record, path)
+        if value is None:
+            continue
+        *parents, last = path.split(".")
+        target = projected
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[last] = value
+    return projected
+
+def values_at(*paths: str) -> Facet:
+    """Facet reading every path; list values contribute each element."""
+    def values(record: dict) -> List[Any]:
+        found = []
+        for path in paths:
+            value = field(record, path)
+            found.extend(value if isinstance(value, list) else [value])
+        return found
+    return values
+
+# -----------------------------
+# File-backed index
+# -----------------------------
+class RecordIndex:
+    """A JSON list file (metadata.json, sitemap.json) held in memory for querying.
+
+    The file is parsed once and re-read only when its size or mtime changes.
+    `facets` map filter names to functions returning a record's values; each
+    facet gets an inverted index (lower-cased value -> record positions).
+    `date` returns the ISO timestamp used by the date range filters.
+    """
+
+    def __init__(self, path: str, facets: Dict[str, Facet], date: Optional[Callable[[dict], Any]] = None):
+        self.path = path
+        self.facets = facets
+        self.date = date
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.records: List[dict] = []
+        self.postings: Dict[str, Dict[str, Set[int]]] = {}
+        self.version = ""
+
+    def refresh(self) -> bool:
+        """Reload if the file changed; returns False when there is nothing to serve.
+
+        A file that cannot be read or parsed (e.g. caught mid-write) keeps the
+        previous snapshot in use and is retried on the next call.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        records = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Could not load {self.path}: {e}")
+                    return self._stamp is not None
+                self._build(records)
+                self._stamp = stamp
+                self.version = f"{stamp[0]:x}-{stamp[1]:x}"
+        return True
+
+    def _build(self, records: List[dict]):
+        postings: Dict[str, Dict[str, Set[int]]] = {name: {} for name in self.facets}
+        for i, record in enumerate(records):
+            for name, values in self.facets.items():
+                for value in values(record):
+                    if value is not None and value != "":
+                        postings[name].setdefault(str(value).lower(), set()).add(i)
+        self.records = records
+        self.postings = postings
+
+    def etag(self, *parts: Any) -> str:
+        """Entity tag for a response derived from the current file version and `parts` (e.g. the query)."""
+        blob = json.dumps([self.version, *parts], sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha1(blob).hexdigest()[:20]
+
+    def query(self, filters: Optional[Dict[str, List[str]]] = None, date_from: Optional[str] = None,
+              date_to: Optional[str] = None, page: int = 1, per_page: int = DEFAULT_PER_PAGE,
+              fields: Optional[List[str]] = None, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """One page of matching records, in file order.
+
+        Values of one filter are alternatives; different filters must all match.
+        Dates compare as ISO strings, so date_to="2024-06" includes all of June.
+        """
+        unknown = sorted(set(filters or {}) - set(self.facets))
+        if unknown:
+            raise ValueError(f"Unknown filter(s) {unknown}; choose from {sorted(self.facets)}")
+        with self._lock:
+            records, postings = self.records, self.postings
+        matches: Optional[Set[int]] = None
+        for name, wanted in (filters or {}).items():
+            hit = set().union(*(postings[name].get(value.lower(), set()) for value in wanted))
+            matches = hit if matches is None else matches & hit
+        positions = range(len(records)) if matches is None else sorted(matches)
+        if (date_from or date_to) and self.date is not None:
+            positions = [i for i in positions if _in_range(self.date(records[i]), date_from, date_to)]
+
+        per_page = max(1, min(per_page, MAX_PER_PAGE))
+        page = max(1, page)
+        total = len(positions)
+        start = (page - 1) * per_page
+        return {
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": (total + per_page - 1) // per_page,
+            "items": [project(records[i], fields, exclude) for i in positions[start:start + per_page]]
+        }
+
+def _in_range(value: Any, date_from: Optional[str], date_to: Optional[str]) -> bool:
+    if not value:
+        return False
+    value = str(value)
+    if date_from and value < date_from:
+        return False
+    if date_to and value[:len(date_to)] > date_to:
+        return False
+    return True
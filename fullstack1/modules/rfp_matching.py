@@ -0,0 +1,147 @@
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from modules import metadata_extractors
+from modules.minhash import MINHASH_VERSION, NUM_PERMUTATIONS, text_signature, jaccard
+from modules.vector_index import HashingEmbedder
+
+SIGNATURE_VERSION = f"{MINHASH_VERSION}-kw-256-1"
+KEYWORD_DIM = 256
+
+# Entities and technologies kept per document for the overlap report
+PROFILE_TERMS = 50
+
+# Weights of the three similarities in the match score
+MATCH_WEIGHTS = {"keywords": 0.5, "text": 0.3, "industry": 0.2}
+
+INDUSTRIES = sorted(metadata_extractors.INDUSTRY_KEYWORDS)
+
+# -----------------------------
+# Signatures
+# -----------------------------
+_keyword_embedder = HashingEmbedder(dim=KEYWORD_DIM, bigrams=False)
+
+def document_profile(enriched: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Industries, organizations and technologies of an enrichment result or metadata record."""
+    enriched = enriched or {}
+    industry_tags = enriched.get("industry_tags") or {}
+    entities = enriched.get("entities") or {}
+    return {
+        "industry_hits": dict(industry_tags.get("industry_hits") or {}),
+        "organizations": list(entities.get("clients") or [])[:PROFILE_TERMS],
+        "technologies": list(entities.get("technologies") or [])[:PROFILE_TERMS]
+    }
+
+def industry_vector(profile: Dict[str, Any]) -> np.ndarray:
+    hits = profile.get("industry_hits") or {}
+    vector = np.log1p(np.array([hits.get(name, 0) for name in INDUSTRIES], dtype=np.float32))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def document_signature(texts: List[str], profile: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Keyword vector, industry vector and MinHash sketch of one document's texts (pages or passages)."""
+    return {
+        "keywords": _keyword_embedder.embed(["\n".join(texts)])[0],
+        "industries": industry_vector(profile),
+        "minhash": text_signature(texts)
+    }
+
+def overlap(a: List[str], b: List[str]) -> List[str]:
+    """Terms of `a` also in `b`, case-insensitively, in the order of `a`."""
+    other = {term.lower() for term in b}
+    return [term for term in a if term.lower() in other]
+
+# -----------------------------
+# Signature index
+# -----------------------------
+class SignatureIndexBuilder:
+    """Collects per-document signatures into one compact .npz, replaced atomically on save()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.docs: List[Dict[str, Any]] = []
+        self._keywords: List[np.ndarray] = []
+        self._industries: List[np.ndarray] = []
+        self._minhash: List[np.ndarray] = []
+
+    def add_document(self, doc: Dict[str, Any], texts: List[str], profile: Dict[str, Any]):
+        signature = document_signature(texts, profile)
+        self.docs.append(dict(doc, **profile))
+        self._keywords.append(signature["keywords"])
+        self._industries.append(signature["industries"])
+        self._minhash.append(signature["minhash"])
+
+    def save(self) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        stack = lambda rows, dim, dtype: np.asarray(rows, dtype=dtype).reshape(len(rows), dim)
+        meta = {"version": SIGNATURE_VERSION, "built_at": time.time(), "docs": self.docs}
+        with open(self.path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                keywords=stack(self._keywords, KEYWORD_DIM, np.float32),
+                industries=stack(self._industries, len(INDUSTRIES), np.float32),
+                minhash=stack(self._minhash, NUM_PERMUTATIONS, np.uint32),
+                meta=np.array(json.dumps(meta, ensure_ascii=False))
+            )
+        os.replace(self.path + ".tmp", self.path)
+        return self.path
+
+class SignatureIndex:
+    """In-memory signatures of every indexed document; match() is one pass of vector ops."""
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            self.keywords = data["keywords"]
+            self.industries = data["industries"]
+            self.minhash = data["minhash"]
+            self.meta = json.loads(str(data["meta"]))
+        self.docs = self.meta["docs"]
+
+    @classmethod
+    def open(cls, path: str) -> Optional["SignatureIndex"]:
+        """The index at path, or None if none was built with the current signature version."""
+        if not os.path.exists(path):
+            return None
+        index = cls(path)
+        return index if index.meta.get("version") == SIGNATURE_VERSION else None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def match(self, texts: List[str], enriched: Optional[Dict[str, Any]], k: int = 10) -> List[dict]:
+        """Past documents most similar to a new one, best first, with their overlaps."""
+        if not len(self) or k <= 0:
+            return []
+        profile = document_profile(enriched)
+        query = document_signature(texts, profile)
+        scores = {
+            "keywords": self.keywords @ query["keywords"],
+            "text": jaccard(query["minhash"], self.minhash),
+            "industry": self.industries @ query["industries"]
+        }
+        total = sum(MATCH_WEIGHTS[name] * values for name, values in scores.items())
+        k = min(k, len(self))
+        top = np.argpartition(-total, k - 1)[:k]
+        top = top[np.argsort(-total[top], kind="stable")]
+
+        matches = []
+        for i in top:
+            doc = self.docs[i]
+            matches.append({
+                "doc_id": doc.get("id"),
+                "filename": doc.get("filename"),
+                "relative_path": doc.get("relative_path"),
+                "score": round(float(total[i]), 4),
+                "scores": {name: round(float(values[i]), 4) for name, values in scores.items()},
+                "overlap": {
+                    "industries": [name for name in INDUSTRIES
+                                   if name in doc["industry_hits"] and name in profile["industry_hits"]],
+                    "entities": overlap(doc["organizations"], profile["organizations"]),
+                    "technologies": overlap(doc["technologies"], profile["technologies"])
+                }
+            })
+        return matches
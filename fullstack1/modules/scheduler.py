@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Yielded by run(..., hold=True) as (None, STALLED) when the next item cannot
+# start until the caller releases some of the results it is holding
+STALLED = object()
+
+class BoundedScheduler:
+    """Runs one coroutine per item with bounded concurrency and memory.
+
+    - At most `concurrency` items run at once.
+    - Admitted items may add up to `memory_budget` cost units (e.g. file bytes;
+      0 = unlimited). An item stays admitted while it runs and, with
+      run(..., hold=True), until the caller release()s it, so results the
+      caller is still holding count against the budget too. An item larger than
+      the whole budget still runs, alone (nothing else admitted), so the queue
+      can never stall. When only held results block the next item, run()
+      yields (None, STALLED) so the caller can release them.
+    - Items are started largest cost first, which keeps the biggest jobs from
+      becoming the tail of the run.
+    - Results are yielded as (index, result-or-exception) as they complete.
+    """
+
+    def __init__(self, concurrency: int = 8, memory_budget: int = 0,
+                 cost: Optional[Callable[[Any], int]] = None, largest_first: bool = True):
+        self.concurrency = max(1, concurrency)
+        self.memory_budget = memory_budget
+        self.cost = cost or (lambda item: 0)
+        self.largest_first = largest_first
+        self.running = 0
+        self.admitted_bytes = 0
+        self._admitted: Dict[int, int] = {}
+        self._changed: Optional[asyncio.Event] = None
+
+    def _fits(self, cost: int) -> bool:
+        if self.running >= self.concurrency:
+            return False
+        if not self._admitted or not self.memory_budget:
+            return True
+        return self.admitted_bytes + cost <= self.memory_budget
+
+    def release(self, index: int):
+        cost = self._admitted.pop(index, None)
+        if cost is not None:
+            self.admitted_bytes -= cost
+            self._changed.set()
+
+    async def run(self, items: List[Any], fn: Callable[[Any], Awaitable[Any]],
+                  hold: bool = False) -> AsyncIterator[Tuple[int, Any]]:
+        self._changed = asyncio.Event()
+        results: asyncio.Queue = asyncio.Queue()
+        costs = [self.cost(item) or 0 for item in items]
+        order = list(range(len(items)))
+        if self.largest_first:
+            order.sort(key=costs.__getitem__, reverse=True)
+        tasks = set()
+
+        async def work(i: int):
+            try:
+                outcome = await fn(items[i])
+            except Exception as e:
+                outcome = e
+            self.running -= 1
+            self._changed.set()
+            results.put_nowait((i, outcome))
+
+        async def feed():
+            for i in order:
+                while not self._fits(costs[i]):
+                    self._changed.clear()
+                    if hold and self.running == 0:
+                        # Nothing in flight will free the budget; only the caller can
+                        results.put_nowait((None, STALLED))
+                    await self._changed.wait()
+                self.running += 1
+                self._admitted[i] = costs[i]
+                self.admitted_bytes += costs[i]
+                task = asyncio.create_task(work(i))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        feeder = asyncio.create_task(feed())
+        try:
+            remaining = len(items)
+            while remaining:
+                i, outcome = await results.get()
+                if outcome is STALLED:
+                    yield None, STALLED
+                    continue
+                remaining -= 1
+                if not hold:
+                    self.release(i)
+                yield i, outcome
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
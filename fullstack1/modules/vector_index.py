@@ -0,0 +1,363 @@
+import os
+import json
+import math
+import zlib
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from modules.passage_index import tokenize
+
+# Rows scored per matrix product during a full scan
+SCAN_BLOCK_ROWS = 65_536
+
+# The IVF coarse quantizer is trained once the index reaches IVF_MIN_ROWS rows
+# and retrained whenever it has doubled since; queries then only score the
+# IVF_NPROBE closest clusters instead of every row
+IVF_MIN_ROWS = 50_000
+IVF_NPROBE = 8
+IVF_TRAIN_SAMPLE = 20_000
+IVF_ITERATIONS = 10
+
+# Deleted rows are only masked; the files are rewritten once they pass this share
+COMPACT_DELETED_RATIO = 0.25
+
+SNIPPET_CHARS = 500
+
+# -----------------------------
+# Embedders
+# -----------------------------
+# An embedder is any object with `name` (changes whenever its vectors would),
+# `dim` and embed(texts) -> float32 array of shape (len(texts), dim) with
+# L2-normalised rows. Register new ones in EMBEDDERS.
+class HashingEmbedder:
+    """Offline default: signed feature hashing of unigrams and bigrams, sublinear tf."""
+
+    def __init__(self, dim: int = 512, bigrams: bool = True):
+        self.dim = dim
+        self.bigrams = bigrams
+        self.name = f"hashing-{dim}-{'bi' if bigrams else 'uni'}-1"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])] if self.bigrams else tokens
+            for feature, count in Counter(features).items():
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[i, h % self.dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+}
+
+def get_embedder(name: str = "hashing", **options):
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder {name!r}; choose from {sorted(EMBEDDERS)}")
+    return EMBEDDERS[name](**options)
+
+# -----------------------------
+# Vector index
+# -----------------------------
+class VectorIndex:
+    """Append-only float32 passage matrix on disk, memory-mapped for search.
+
+    Files under `path`:
+      vectors.f32     row-major float32 matrix, `dim` columns
+      items.ndjson    one JSON line per row: doc id, filename, page, offsets, snippet
+      meta.json       embedder, dim, committed row count, deletions
+      ivf_*.npy       optional coarse quantizer: centroids and row assignments
+    meta.json is replaced atomically on commit() and its row count is the
+    commit point: rows past it (an interrupted append) are truncated on open.
+    Deletions map a doc id to the row count at the time of delete(): only the
+    rows before it are dead, so a document added back later is live again.
+    Searches may run while another thread appends and commits; a lock keeps
+    them from seeing a half-refreshed index.
+    """
+
+    def __init__(self, path: str, embedder):
+        self.path = path
+        self.embedder = embedder
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.items_path = os.path.join(path, "items.ndjson")
+        self.meta_path = os.path.join(path, "meta.json")
+        self._pending_rows = 0
+        self._lock = threading.RLock()
+        self.meta = self._read_meta()
+        if self.meta is None or self.meta["embedder"] != embedder.name or self.meta["dim"] != embedder.dim:
+            # Vectors from another embedder are not comparable: start over
+            self._reset()
+        if isinstance(self.meta["deleted"], list):
+            # Older format: a list of doc ids, all of whose rows are dead
+            self.meta["deleted"] = {doc_id: self.meta["count"] for doc_id in self.meta["deleted"]}
+        self._truncate()
+        with open(self.items_path, "r", encoding="utf-8") as f:
+            self.items: List[Dict[str, Any]] = [json.loads(line) for line in f]
+        self._load_ivf()
+        self._refresh()
+
+    # -----------------------------
+    # Storage
+    # -----------------------------
+    @property
+    def dim(self) -> int:
+        return self.meta["dim"]
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_meta(self):
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def _reset(self):
+        self.meta = {"embedder": self.embedder.name, "dim": self.embedder.dim, "count": 0,
+                     "deleted": {}, "ivf_rows": 0}
+        for path in (self.vectors_path, self.items_path):
+            open(path, "wb").close()
+        self._drop_ivf()
+        self._write_meta()
+
+    def _truncate(self):
+        """Drop rows written after the last commit."""
+        count = self.meta["count"]
+        for path in (self.vectors_path, self.items_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(count * self.dim * 4)
+        with open(self.items_path, "rb") as f:
+            lines = f.readlines()
+        if len(lines) != count:
+            with open(self.items_path, "wb") as f:
+                f.writelines(lines[:count])
+
+    def _refresh(self):
+        """Re-map the committed rows and rebuild the live-row mask and IVF lists."""
+        count = len(self)
+        self.vectors = (np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim))
+                        if count else np.zeros((0, self.dim), dtype=np.float32))
+        self.live = np.fromiter((self._is_live(row, item) for row, item in enumerate(self.items[:count])),
+                                dtype=bool, count=count)
+        if self.centroids is not None:
+            self._list_order = np.argsort(self.assign, kind="stable")
+            self._list_ptr = np.searchsorted(self.assign[self._list_order], np.arange(len(self.centroids) + 1))
+
+    def _is_live(self, row: int, item: Dict[str, Any]) -> bool:
+        return row >= self.meta["deleted"].get(item["doc_id"], 0)
+
+    def doc_ids(self) -> Set[str]:
+        """Documents with live rows, including appends not yet committed."""
+        with self._lock:
+            return {item["doc_id"] for row, item in enumerate(self.items) if self._is_live(row, item)}
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+    def add_document(self, doc: Dict[str, Any], passages: List[dict]):
+        """Embed and append one document's passages; visible after commit()."""
+        if not passages:
+            return
+        vectors = self.embedder.embed([p["text"] for p in passages]).astype(np.float32, copy=False)
+        with self._lock:
+            self._append(doc, passages, vectors)
+
+    def _append(self, doc: Dict[str, Any], passages: List[dict], vectors: np.ndarray):
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+        with open(self.items_path, "a", encoding="utf-8") as f:
+            for p in passages:
+                item = {
+                    "doc_id": doc["id"],
+                    "filename": doc.get("filename"),
+                    "relative_path": doc.get("relative_path"),
+                    "page": p["page"],
+                    "start": p["start"],
+                    "end": p["end"],
+                    "text": p["text"][:SNIPPET_CHARS]
+                }
+                self.items.append(item)
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._pending_rows += len(passages)
+
+    def delete(self, doc_ids: Iterable[str]):
+        """Hide every row these documents have so far; visible after commit()."""
+        with self._lock:
+            for doc_id in doc_ids:
+                self.meta["deleted"][doc_id] = len(self.items)
+
+    def commit(self):
+        """Publish appended rows and deletions; compacts and (re)trains the IVF when due."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        self.meta["count"] += self._pending_rows
+        self._pending_rows = 0
+        for path in (self.vectors_path, self.items_path):
+            with open(path, "ab") as f:
+                os.fsync(f.fileno())
+        self._write_meta()
+        self._refresh()
+        if len(self) and (~self.live).sum() > COMPACT_DELETED_RATIO * len(self):
+            self._compact()
+        if len(self) >= IVF_MIN_ROWS and (self.centroids is None or len(self) >= 2 * self.meta["ivf_rows"]):
+            self.train_ivf()
+        elif self.centroids is not None and len(self.assign) < len(self):
+            self.assign = np.concatenate([self.assign, self._nearest_centroids(len(self.assign), len(self))])
+            self._save_ivf()
+            self._refresh()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.live)
+        vectors = np.asarray(self.vectors[keep]) if len(keep) else np.zeros((0, self.dim), dtype=np.float32)
+        items = [self.items[i] for i in keep]
+        self.vectors = None  # release the map before replacing the file (Windows)
+        with open(self.vectors_path + ".tmp", "wb") as f:
+            f.write(vectors.tobytes())
+        with open(self.items_path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        os.replace(self.vectors_path + ".tmp", self.vectors_path)
+        os.replace(self.items_path + ".tmp", self.items_path)
+        self.items = items
+        self.meta.update(count=len(items), deleted={}, ivf_rows=0)
+        self._drop_ivf()
+        self._write_meta()
+        self._refresh()
+
+    # -----------------------------
+    # IVF coarse quantizer
+    # -----------------------------
+    def _ivf_paths(self):
+        return os.path.join(self.path, "ivf_centroids.npy"), os.path.join(self.path, "ivf_assign.npy")
+
+    def _load_ivf(self):
+        centroids_path, assign_path = self._ivf_paths()
+        self.centroids: Optional[np.ndarray] = None
+        self.assign: Optional[np.ndarray] = None
+        if os.path.exists(centroids_path) and os.path.exists(assign_path):
+            self.centroids = np.load(centroids_path)
+            self.assign = np.load(assign_path)[:len(self)]
+            if len(self.assign) < len(self):
+                self.assign = np.concatenate([self.assign, self._nearest_centroids(len(self.assign), len(self))])
+
+    def _save_ivf(self):
+        centroids_path, assign_path = self._ivf_paths()
+        np.save(centroids_path, self.centroids)
+        np.save(assign_path, self.assign)
+
+    def _drop_ivf(self):
+        self.centroids, self.assign = None, None
+        for path in self._ivf_paths():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _nearest_centroids(self, start: int, stop: int) -> np.ndarray:
+        vectors = self.vectors if len(self.vectors) >= stop else np.memmap(
+            self.vectors_path, dtype=np.float32, mode="r", shape=(stop, self.dim))
+        parts = [np.argmax(vectors[a:min(a + SCAN_BLOCK_ROWS, stop)] @ self.centroids.T, axis=1)
+                 for a in range(start, stop, SCAN_BLOCK_ROWS)]
+        return np.concatenate(parts).astype(np.int32) if parts else np.zeros(0, dtype=np.int32)
+
+    def train_ivf(self, n_lists: Optional[int] = None, seed: int = 0):
+        """Spherical k-means on a sample of live rows, then assign every row to a list."""
+        rows = np.flatnonzero(self.live)
+        if not len(rows):
+            return
+        n_lists = n_lists or int(min(4096, max(16, math.sqrt(len(rows)))))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(self.vectors[np.sort(rng.choice(rows, min(len(rows), IVF_TRAIN_SAMPLE), replace=False))])
+        n_lists = min(n_lists, len(sample))
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(IVF_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids.astype(np.float32)
+        self.assign = self._nearest_centroids(0, len(self))
+        self.meta["ivf_rows"] = len(self)
+        self._save_ivf()
+        self._write_meta()
+        self._refresh()
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def search(self, query: str, k: int = 5, nprobe: int = IVF_NPROBE) -> List[dict]:
+        return self.search_vectors(self.embedder.embed([query]), k, nprobe)[0]
+
+    def search_vectors(self, queries: np.ndarray, k: int = 5, nprobe: int = IVF_NPROBE) -> List[List[dict]]:
+        """Top-k rows per query row (cosine similarity), as result dicts."""
+        with self._lock:
+            return self._search_vectors(np.asarray(queries, dtype=np.float32), k, nprobe)
+
+    def _search_vectors(self, queries: np.ndarray, k: int, nprobe: int) -> List[List[dict]]:
+        if not len(self) or k <= 0:
+            return [[] for _ in range(len(queries))]
+        if self.centroids is None:
+            scores, rows = self._scan(queries, None, k)
+        else:
+            # Each query only scans the rows of its nprobe nearest lists
+            # The probed lists may hold fewer than k rows: pad to k so rows line up
+            results = [_pad(*self._scan(q[None, :], self._probe(q, nprobe), k), k) for q in queries]
+            scores = np.concatenate([s for s, _ in results])
+            rows = np.concatenate([r for _, r in results])
+        return [
+            [dict(self.items[row], score=round(float(score), 4)) for score, row in zip(s, r) if np.isfinite(score)]
+            for s, r in zip(scores, rows)
+        ]
+
+    def _probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.sort(np.concatenate([
+            self._list_order[self._list_ptr[c]:self._list_ptr[c + 1]] for c in nearest
+        ]))
+
+    def _scan(self, queries: np.ndarray, rows: Optional[np.ndarray], k: int):
+        """Blockwise matrix products keeping a running top-k per query."""
+        m = len(queries)
+        best_scores = np.full((m, 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((m, 0), dtype=np.int64)
+        total = len(self) if rows is None else len(rows)
+        for start in range(0, total, SCAN_BLOCK_ROWS):
+            stop = min(start + SCAN_BLOCK_ROWS, total)
+            index = np.arange(start, stop) if rows is None else rows[start:stop]
+            block = self.vectors[start:stop] if rows is None else self.vectors[index]
+            scores = (block @ queries.T).T
+            scores[:, ~self.live[index]] = -np.inf
+            kk = min(k, scores.shape[1])
+            top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, 1)], axis=1)
+            best_rows = np.concatenate([best_rows, index[top]], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, 1)
+                best_rows = np.take_along_axis(best_rows, keep, 1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_scores, order, 1), np.take_along_axis(best_rows, order, 1)
+
+def _pad(scores: np.ndarray, rows: np.ndarray, k: int):
+    missing = k - scores.shape[1]
+    if missing <= 0:
+        return scores, rows
+    return (np.pad(scores, ((0, 0), (0, missing)), constant_values=-np.inf),
+            np.pad(rows, ((0, 0), (0, missing))))
@@ -0,0 +1,59 @@
+from modules.dedup import plan_exact_duplicates, copy_record
+from modules.incremental import plan_incremental
+
+def entry(path, digest):
+    return {"id": digest[:12], "hash": digest, "filename": path, "relative_path": path,
+            "domain": "D", "region": "R", "client": "C"}
+
+def first_run(sitemap):
+    """Metadata a full ingest writes for the sitemap (extraction faked)."""
+    plan = plan_exact_duplicates(sitemap, sitemap)
+    records = []
+    for e in plan["to_process"]:
+        record = {"id": e["id"], "hash": e["hash"], "filename": e["filename"],
+                  "relative_path": e["relative_path"], "tags": {}}
+        if e["relative_path"] in plan["duplicate_paths"]:
+            record["duplicate_paths"] = plan["duplicate_paths"][e["relative_path"]]
+        records.append(record)
+        records.extend(copy_record(record, c) for c in plan["copies"].get(e["relative_path"], []))
+    return records
+
+def incremental_run(sitemap, previous):
+    plan = plan_incremental(sitemap, previous)
+    return plan, plan_exact_duplicates(plan["to_process"], sitemap, plan["unchanged"], previous)
+
+def test_full_run_extracts_one_copy():
+    previous = first_run([entry("a.pdf", "h1"), entry("b.pdf", "h1")])
+    assert previous[0]["duplicate_paths"] == ["b.pdf"]
+    assert previous[1]["duplicate_of"] == "a.pdf"
+
+def test_canonical_changed_then_deleted():
+    previous = first_run([entry("a.pdf", "h1"), entry("b.pdf", "h1")])
+
+    # a.pdf is edited: b.pdf becomes the document for h1
+    plan, exact = incremental_run([entry("a.pdf", "h2"), entry("b.pdf", "h1")], previous)
+    assert [e["relative_path"] for e in exact["to_process"]] == ["a.pdf"]
+    assert exact["duplicate_paths"] == {}
+    (record,) = exact["unchanged"]
+    assert record["relative_path"] == "b.pdf"
+    assert "duplicate_of" not in record and "duplicate_paths" not in record
+    assert exact["regraph"] == [record]
+    assert exact["moved_ids"] == ["h1"]
+
+    # a.pdf is deleted instead: same outcome, and h1 is not a deleted document
+    plan, exact = incremental_run([entry("b.pdf", "h1")], previous)
+    assert plan["deleted_ids"] == []
+    assert exact["to_process"] == []
+    assert [r["relative_path"] for r in exact["regraph"]] == ["b.pdf"]
+    assert "duplicate_of" not in exact["unchanged"][0]
+    assert exact["moved_ids"] == ["h1"]
+
+def test_new_copy_of_unchanged_document():
+    previous = first_run([entry("a.pdf", "h1")])
+    plan, exact = incremental_run([entry("a.pdf", "h1"), entry("c.pdf", "h1")], previous)
+    assert exact["to_process"] == []
+    canonical, copy = exact["unchanged"]
+    assert canonical["duplicate_paths"] == ["c.pdf"]
+    assert copy["relative_path"] == "c.pdf" and copy["duplicate_of"] == "a.pdf"
+    assert exact["regraph"] == [canonical]
+    assert exact["moved_ids"] == []
@@ -0,0 +1,40 @@
+import re
+
+import pytest
+
+from modules.metadata_extractors import INDUSTRY_KEYWORDS, KeywordMatcher, match_industry_keywords
+
+def per_keyword_hits(text: str, taxonomy=INDUSTRY_KEYWORDS):
+    """Reference: search each keyword on its own, as the original extractor did."""
+    hits = {}
+    for label, terms in taxonomy.items():
+        offsets = sorted(
+            m.start()
+            for term in terms
+            for m in re.finditer(rf"\b{re.escape(term.lower())}\b", text.lower())
+        )
+        if offsets:
+            hits[label] = {"count": len(offsets), "offsets": offsets}
+    return hits
+
+PHRASES = [
+    "We apply machine learning",
+    "Machine Learning and AI for supply chain automation",
+    "cloud data platform; machine learning, deep learning and e-learning",
+    "The school's learning platform runs on AI (not AIs) in the cloud.",
+    "patient data, hospital software, POS inventory and store customer data",
+    "",
+    "no industry words here",
+]
+
+@pytest.mark.parametrize("text", PHRASES)
+def test_matches_per_keyword_search(text):
+    assert match_industry_keywords(text) == per_keyword_hits(text)
+
+def test_shorter_term_inside_longer_term_is_reported():
+    assert sorted(match_industry_keywords("We apply machine learning")) == ["Education", "Technology"]
+
+def test_terms_sharing_a_prefix_are_all_reported():
+    taxonomy = {"A": ["data"], "B": ["data platform"], "C": ["platform"]}
+    text = "A data platform, data platforms and Data."
+    assert KeywordMatcher(taxonomy).match(text) == per_keyword_hits(text, taxonomy)
@@ -0,0 +1,20 @@
+import asyncio
+
+import pytest
+
+from modules import metadata_extractors as me
+
+def test_run_profile_follows_threads_and_restores():
+    async def profile_in_thread():
+        return await asyncio.to_thread(me.current_profile)
+
+    with me.run_profile("entities"):
+        assert asyncio.run(profile_in_thread()) == "entities"
+        assert me.extractor_config()["extractors"] == ["organizations"]
+    assert me.current_profile() == me.DEFAULT_PROFILE
+    assert me.extractor_config() == me.extractor_config(me.DEFAULT_PROFILE)
+
+def test_unknown_profile_rejected():
+    with pytest.raises(ValueError):
+        with me.run_profile("nope"):
+            pass
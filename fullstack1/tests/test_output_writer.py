@@ -0,0 +1,21 @@
+import csv
+
+from modules.output_writer import OutputWriter
+
+def test_csv_header_covers_every_record(tmp_path):
+    path = str(tmp_path / "metadata.csv")
+    records = [
+        {"filename": "a.pdf", "page_count": 3},
+        {"error": "broken", "filename": "b.pdf"},
+        {"filename": "c.pdf", "language": "en"},
+    ]
+    OutputWriter(path, "csv").write(records)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert reader.fieldnames == ["filename", "page_count", "error", "language"]
+    assert [row["filename"] for row in rows] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert rows[1]["error"] == "broken" and rows[1]["page_count"] == ""
+    assert rows[2]["language"] == "en"
+    assert not (tmp_path / "metadata.csv.partial").exists()
@@ -0,0 +1,30 @@
+import json
+
+from modules.record_index import RecordIndex, values_at
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+
+def test_unreadable_file_keeps_previous_snapshot(tmp_path):
+    path = tmp_path / "sitemap.json"
+    index = RecordIndex(str(path), facets={"domain": values_at("domain")})
+    assert not index.refresh()  # no file yet
+
+    write(path, json.dumps([{"domain": "Finance"}, {"domain": "Retail"}]))
+    assert index.refresh()
+    version = index.version
+
+    write(path, '[{"domain": "Fin')  # caught mid-write
+    assert index.refresh()
+    assert index.version == version
+    assert index.query({"domain": ["finance"]})["total"] == 1
+
+    write(path, json.dumps([{"domain": "Legal"}]))
+    assert index.refresh()
+    assert index.query()["items"] == [{"domain": "Legal"}]
+
+def test_unreadable_file_without_snapshot(tmp_path):
+    path = tmp_path / "metadata.json"
+    write(path, "not json")
+    index = RecordIndex(str(path), facets={})
+    assert not index.refresh()
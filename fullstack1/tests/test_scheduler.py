@@ -0,0 +1,60 @@
+import asyncio
+
+from modules.scheduler import BoundedScheduler, STALLED
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_held_results_count_against_budget():
+    scheduler = BoundedScheduler(concurrency=4, memory_budget=100, cost=lambda item: item)
+    peaks = []
+
+    async def work(item):
+        peaks.append(scheduler.admitted_bytes)
+        await asyncio.sleep(0)
+        return item
+
+    async def consume():
+        held, done = [], []
+        async for i, outcome in scheduler.run([60] * 10, work, hold=True):
+            if outcome is STALLED:
+                for j in held:
+                    scheduler.release(j)
+                done.extend(held)
+                held = []
+                continue
+            held.append(i)
+        return done + held
+
+    finished = run(consume())
+    assert sorted(finished) == list(range(10))
+    assert max(peaks) <= scheduler.memory_budget
+
+def test_item_larger_than_budget_runs_alone():
+    scheduler = BoundedScheduler(concurrency=4, memory_budget=100, cost=lambda item: item)
+    seen = []
+
+    async def work(item):
+        seen.append((item, scheduler.running, scheduler.admitted_bytes))
+        await asyncio.sleep(0)
+        return item
+
+    async def consume():
+        return [outcome async for _, outcome in scheduler.run([500, 10, 10], work)]
+
+    assert sorted(run(consume())) == [10, 10, 500]
+    assert seen[0] == (500, 1, 500)
+    assert all(admitted <= 100 for item, _, admitted in seen if item != 500)
+
+def test_results_without_hold_are_released():
+    scheduler = BoundedScheduler(concurrency=2, memory_budget=100, cost=lambda item: item)
+
+    async def work(item):
+        await asyncio.sleep(0)
+        return item * 2
+
+    async def consume():
+        return {i: outcome async for i, outcome in scheduler.run([60, 60, 60], work)}
+
+    assert run(consume()) == {0: 120, 1: 120, 2: 120}
+    assert scheduler.admitted_bytes == 0
@@ -0,0 +1,19 @@
+import pytest
+
+from modules.metadata_extractors import StreamingEnricher, match_industry_keywords
+
+PAGE_SETS = [
+    ["", "banking portfolio"],
+    ["", "", "patient data", "", "cloud hospital"],
+    ["machine learning", "school"],
+]
+
+@pytest.mark.parametrize("pages", PAGE_SETS)
+def test_offsets_match_joined_text(pages):
+    enricher = StreamingEnricher(head_chars=1000)
+    for page in pages:
+        enricher.feed(page)
+    text = "\n".join(pages)
+    assert enricher.char_count == len(text)
+    assert enricher.head == text
+    assert enricher.industry_hits == match_industry_keywords(text)
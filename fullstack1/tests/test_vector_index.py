@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from modules import vector_index as vi
+from modules.vector_index import VectorIndex, HashingEmbedder
+
+def passages(*texts):
+    return [{"page": 1, "start": 0, "end": len(t), "text": t} for t in texts]
+
+def doc(doc_id):
+    return {"id": doc_id, "filename": f"{doc_id}.pdf", "relative_path": f"{doc_id}.pdf"}
+
+def open_index(path):
+    return VectorIndex(str(path), HashingEmbedder(dim=64))
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_add_delete_readd(tmp_path, monkeypatch, compact):
+    if not compact:
+        monkeypatch.setattr(vi, "COMPACT_DELETED_RATIO", 1.0)  # deleted rows stay masked
+    index = open_index(tmp_path)
+    index.add_document(doc("a"), passages("hospital patient records"))
+    index.add_document(doc("b"), passages("banking portfolio equity"))
+    index.commit()
+
+    index.delete(["a"])
+    index.commit()
+    assert index.doc_ids() == {"b"}
+    assert all(hit["doc_id"] != "a" for hit in index.search("hospital patient", k=5))
+
+    index.add_document(doc("a"), passages("hospital patient records"))
+    index.commit()
+    for reopened in (index, open_index(tmp_path)):
+        assert reopened.doc_ids() == {"a", "b"}
+        hits = reopened.search("hospital patient", k=5)
+        assert hits[0]["doc_id"] == "a"
+        assert [hit["doc_id"] for hit in hits].count("a") == 1  # the old row stays dead
+
+def test_ivf_search_with_uneven_lists(tmp_path, monkeypatch):
+    monkeypatch.setattr(vi, "IVF_MIN_ROWS", 10**9)  # train explicitly below
+    index = open_index(tmp_path)
+    for i in range(30):
+        index.add_document(doc(f"bank{i}"), passages(f"banking portfolio equity trading desk {i}"))
+    for i in range(3):
+        index.add_document(doc(f"care{i}"), passages(f"hospital patient clinical ward {i}"))
+    index.commit()
+    index.train_ivf(n_lists=4)
+    sizes = np.diff(index._list_ptr)
+    assert sizes.min() < 10 <= sizes.max()
+
+    queries = index.embedder.embed(["hospital patient clinical", "banking portfolio equity"])
+    results = index.search_vectors(queries, k=10, nprobe=1)
+    assert len(results) == 2
+    for query, hits in zip(queries, results):
+        probed = index._probe(query, 1)
+        assert len(hits) == min(10, len(probed))
+        scores = [hit["score"] for hit in hits]
+        assert scores == sorted(scores, reverse=True)